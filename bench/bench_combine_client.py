@@ -0,0 +1,71 @@
+# bench/bench_combine_client.py
+# Per-request latency against a local stub server: a fresh connection per
+# combine (the old httpx.post) vs the pooled CombineClient.
+#   python bench/bench_combine_client.py [requests]
+import os, statistics, sys, time
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from combine_client import CombineClient
+from stub_server import StubCombineServer
+
+
+def percentiles(samples):
+    s = sorted(samples)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))] * 1e3
+    return {"mean_ms": statistics.fmean(s) * 1e3, "p50_ms": pick(0.50),
+            "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def fresh_connections(url, n):
+    samples = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        httpx.post(url, json={"a": f"a{i}", "b": "b"}, timeout=60)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def pooled(url, n):
+    client = CombineClient(url)
+    samples = []
+    try:
+        for i in range(n):
+            t0 = time.perf_counter()
+            client.combine(f"a{i}", "b")
+            samples.append(time.perf_counter() - t0)
+    finally:
+        client.close()
+    return samples
+
+
+def pooled_concurrent(url, n, workers=4):
+    client = CombineClient(url, max_workers=workers)
+    try:
+        t0 = time.perf_counter()
+        wait([client.submit(f"a{i}", "b") for i in range(n)])
+        return time.perf_counter() - t0
+    finally:
+        client.close()
+
+
+def main(n=300):
+    for label, fn in (("fresh connection per request", fresh_connections),
+                      ("pooled CombineClient", pooled)):
+        with StubCombineServer() as stub:
+            stats = percentiles(fn(stub.url, n))
+            print(f"{label:<30} connections={stub.connections:<4} "
+                  + " ".join(f"{k}={v:.2f}" for k, v in stats.items()))
+    with StubCombineServer(delay=0.02) as stub:
+        serial = sum(pooled(stub.url, 50))
+    with StubCombineServer(delay=0.02) as stub:
+        parallel = pooled_concurrent(stub.url, 50)
+    print(f"50 requests with 20ms server time: serial {serial:.2f}s, 4 workers {parallel:.2f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,208 @@
+# bench/bench_core.py
+# Headless benchmarks for GameCore (no Kivy, no display) over synthetic saves:
+# recipe lookup, inventory sorting, save/load with JSON and binary snapshots and
+# SQLite, recording new recipes and the combine flow against the local stub server.
+#   python bench/bench_core.py                        # 1k, 10k and 100k recipes
+#   python bench/bench_core.py --sizes 1000,1000000 --out results.json
+# A summary goes to stderr, the full results as JSON to stdout (or --out).
+import argparse, json, os, platform, random, shutil, statistics, sys, tempfile, time, tracemalloc
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from combine_client import CombineClient
+from game_core import GameCore
+from game_store import JournalStore, SqliteStore
+from recipe_index import RecipeIndex
+from stub_server import StubCombineServer
+
+WORDS = ("steam", "mud", "stone", "fire", "cloud", "golem", "tree", "glass", "storm",
+         "dragon", "ocean", "volcano", "robot", "castle", "moon", "swamp")
+
+
+def synthetic_save(n_recipes, seed=0):
+    """(recipes, inventory, favorites): n_recipes recipes over about n/4 elements"""
+    rng = random.Random(seed)
+    names = [f"{rng.choice(WORDS)} {i}" if i % 3 else f"{rng.choice(WORDS)}{i}"
+             for i in range(max(8, n_recipes // 4))]
+    recipes = RecipeIndex()
+    while len(recipes) < n_recipes:
+        recipes.add(rng.choice(names), rng.choice(names), rng.choice(names))
+    favorites = set(rng.sample(names, min(50, len(names))))
+    return recipes, set(names), favorites
+
+
+def summarize(samples, ops=1, peak=None):
+    """Latency percentiles of per-call `samples` (seconds), each covering `ops` operations"""
+    s = sorted(samples)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))] * 1e3
+    total = sum(s)
+    return {"calls": len(s), "ops_per_s": len(s) * ops / total if total else None,
+            "mean_ms": statistics.fmean(s) * 1e3, "p50_ms": pick(0.50),
+            "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "peak_kib": None if peak is None else peak / 1024}
+
+
+def peak_memory(fn):
+    """Peak bytes allocated while fn() runs (traced, so it's also much slower)"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat=3, memory=True):
+    """Time `repeat` calls of fn(), then one more for peak memory"""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, peak=peak_memory(fn) if memory else None)
+
+
+def measure_each(fn, calls, memory=True):
+    """Time fn(*args) for every args in `calls`; latency is per call"""
+    samples = []
+    for args in calls:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    peak = None
+    if memory:
+        peak = peak_memory(lambda: [fn(*args) for args in calls])
+    return summarize(samples, peak=peak)
+
+
+def bench_size(n, workdir, lookups=20000, records=5000):
+    recipes, inventory, favorites = synthetic_save(n)
+    pairs = [pair for pair, _result in recipes.items()]
+    rng = random.Random(1)
+    names = sorted(inventory)
+    # half hits, half (mostly) misses
+    probes = [rng.choice(pairs) if i % 2 else (rng.choice(names), rng.choice(names))
+              for i in range(lookups)]
+    results = {}
+
+    def fresh_core(stem):
+        # Every section gets its own copy of the state and its own files, so
+        # what one writes (record's journal, say) can't leak into the next
+        core = GameCore(JournalStore(os.path.join(workdir, stem)))
+        core.recipes, core.inventory, core.favorites = recipes.copy(), set(inventory), set(favorites)
+        return core
+
+    # ---- JSON snapshot + journal
+    core = fresh_core(f"save_{n}_json.json")
+    results["journal_save"] = measure(lambda: core.save(wait=True))
+    results["journal_save"]["file_bytes"] = os.path.getsize(core.store.snapshot_path)
+    results["journal_load"] = measure(core.read_save)
+    results["lookup"] = measure_each(core.lookup, probes)
+    results["sort_inventory"] = measure(core.sorted_inventory)
+    core.close()
+
+    # ---- Binary snapshot
+    core = fresh_core(f"save_{n}_binary.bin")
+    results["binary_save"] = measure(lambda: core.save(wait=True))
+    results["binary_save"]["file_bytes"] = os.path.getsize(core.store.snapshot_path)
+    results["binary_load"] = measure(core.read_save)
+    core.close()
+
+    # ---- Recording (journal appends), on a throwaway copy
+    core = fresh_core(f"save_{n}_record.json")
+    new = [(rng.choice(names), f"new {i}", f"made {i}") for i in range(records)]
+    results["record"] = measure_each(core.record, new, memory=False)
+    core.close()
+
+    # ---- SQLite (recipes stay on disk, looked up per combine)
+    def sqlite_save():
+        path = os.path.join(workdir, f"save_{n}_{time.perf_counter_ns()}.db")
+        store = SqliteStore(path)
+        store.compact(recipes, inventory, favorites)
+        store.close()
+        return path
+
+    results["sqlite_save"] = measure(sqlite_save, repeat=1)
+    core = GameCore(SqliteStore(sqlite_save()))
+    results["sqlite_load"] = measure(core.read_save)
+    core.load()
+    results["sqlite_lookup"] = measure_each(core.lookup, probes[:lookups // 4])
+    core.close()
+    return results
+
+
+def bench_combine(requests=300, delay=0.0, workers=4):
+    """Combine flow through GameCore against the stub: submit, wait, record"""
+    out = {}
+    with StubCombineServer(delay=delay) as stub:
+        core = GameCore(JournalStore(os.path.join(tempfile.mkdtemp(), "net.json")),
+                        CombineClient(stub.url, max_workers=workers))
+        core.load()
+        try:
+            # A failed combine (no httpx, stub still failing after retries) is
+            # counted, not recorded, so one bad request doesn't sink the report
+            failures = 0
+            samples = []
+            for i in range(requests):
+                t0 = time.perf_counter()
+                result, _error = core.submit(f"a{i}", "b").result()
+                if result:
+                    core.record(f"a{i}", "b", result)
+                else:
+                    failures += 1
+                samples.append(time.perf_counter() - t0)
+            out["serial"] = summarize(samples)
+            t0 = time.perf_counter()
+            futures = [(i, core.submit(f"c{i}", "d")) for i in range(requests)]
+            wait([f for _i, f in futures])
+            for i, f in futures:
+                result, _error = f.result()
+                if result:
+                    core.record(f"c{i}", "d", result)
+                else:
+                    failures += 1
+            out[f"concurrent_{workers}"] = summarize([time.perf_counter() - t0], ops=requests)
+            out["connections"] = stub.connections
+            out["retries"] = core.client.retries
+            out["failures"] = failures
+        finally:
+            core.close()
+            shutil.rmtree(os.path.dirname(core.store.snapshot_path), ignore_errors=True)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the UI-free game core")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated recipe counts (up to 1000000)")
+    parser.add_argument("--requests", type=int, default=300, help="combine requests to the stub")
+    parser.add_argument("--delay", type=float, default=0.0, help="stub server time per request (s)")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "platform": platform.platform(),
+              "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "sizes": {}}
+    workdir = tempfile.mkdtemp(prefix="bench_core_")
+    try:
+        for n in (int(x) for x in args.sizes.split(",")):
+            report["sizes"][n] = results = bench_size(n, workdir)
+            for op, r in results.items():
+                print(f"{n:>8} {op:<15} {r['ops_per_s'] or 0:>12.0f} ops/s  p50 {r['p50_ms']:.3f}  "
+                      f"p99 {r['p99_ms']:.3f} ms  peak {r['peak_kib'] or 0:.0f} KiB", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    report["combine"] = bench_combine(args.requests, args.delay)
+    print(f"combine: {json.dumps(report['combine'])}", file=sys.stderr)
+
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench/bench_layout.py
+# Headless FlexGridLayout benchmark: old per-add layout scheduling vs the
+# coalesced single pass. Run from the repo root:  python bench/bench_layout.py
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chip_layout import column_count, grid_positions
+
+PADDING = 8
+SPACING = 8
+MIN_ITEM_WIDTH = 80
+MIN_ROW = 50
+WIDTH = 420
+
+
+class FakeChip:
+    """Stands in for a chip widget: just the attributes the layout touches"""
+    __slots__ = ("pos", "width", "height")
+
+    def __init__(self, height):
+        self.pos = (0, 0)
+        self.width = 0
+        self.height = height
+
+
+def legacy_pass(children, width, top):
+    """The original FlexGridLayout.do_layout, minus Kivy"""
+    available_width = width - (2 * PADDING)
+    cols = max(1, int(available_width / MIN_ITEM_WIDTH))
+    col_width = available_width / cols
+    col = 0
+    current_row_height = MIN_ROW
+    y_offset = 0
+    for child in children:
+        child.pos = (PADDING + (col * col_width), top - PADDING - y_offset - child.height)
+        child.width = col_width - SPACING
+        current_row_height = max(current_row_height, child.height)
+        col += 1
+        if col >= cols:
+            col = 0
+            y_offset += current_row_height + SPACING
+            current_row_height = MIN_ROW
+    return max(MIN_ROW, y_offset + current_row_height + (2 * PADDING))
+
+
+def coalesced_pass(children, width, slots):
+    """What FlexGridLayout.do_layout does now for one dirty frame"""
+    available_width = width - (2 * PADDING)
+    cols = column_count(available_width, MIN_ITEM_WIDTH)
+    col_width = available_width / cols
+    positions, total_height = grid_positions(
+        [c.height for c in children], cols, col_width, PADDING, SPACING, MIN_ROW, MIN_ROW)
+    child_width = col_width - SPACING
+    moved = 0
+    for child, pos in zip(children, positions):
+        slot = (pos, child_width)
+        if slots.get(child) != slot:
+            slots[child] = slot
+            child.pos = pos
+            child.width = child_width
+            moved += 1
+    return total_height, moved
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def run(n, rng):
+    children = [FakeChip(rng.choice((54, 67, 81))) for _ in range(n)]
+
+    # Before: every add_widget queued its own full pass, so building n chips
+    # ran n passes over the whole grid. Running all of them takes hours at
+    # 50k, so this times one pass and multiplies: an estimate, not a measurement.
+    samples = [timed(legacy_pass, children, WIDTH, 10_000)[0] for _ in range(3)]
+    legacy_one = min(samples)
+
+    # After: the adds collapse into one pass. Scrolling (a pos change) runs no
+    # pass at all since children are in local coordinates, so there's nothing
+    # to time for it here.
+    slots = {}
+    build_s, (height, moved) = timed(coalesced_pass, children, WIDTH, slots)
+
+    # Single changes: only slots that changed get touched, but with the origin
+    # at the bottom left, anything that changes the height (a new row) or
+    # shifts the order (an insert before the end) moves every chip anyway.
+    cols = column_count(WIDTH - 2 * PADDING, MIN_ITEM_WIDTH)
+    changes = {}
+    for case in ("append", "new_row", "insert_front"):
+        if case == "append" and len(children) % cols == 0:
+            children.append(FakeChip(54))  # into a partly filled row
+            coalesced_pass(children, WIDTH, slots)
+        elif case == "new_row":
+            while len(children) % cols:
+                children.append(FakeChip(54))  # fill the last row
+            coalesced_pass(children, WIDTH, slots)
+        chip = FakeChip(54)
+        if case == "insert_front":
+            children.insert(0, chip)
+        else:
+            children.append(chip)
+        seconds, (_, case_moved) = timed(coalesced_pass, children, WIDTH, slots)
+        changes[case] = (seconds * 1e3, case_moved)
+
+    return {
+        "children": n,
+        "before_one_pass_ms": legacy_one * 1e3,
+        "before_build_passes": n,
+        "before_build_s_estimated": legacy_one * n,
+        "before_scroll_pass_ms": legacy_one * 1e3,
+        "after_build_ms": build_s * 1e3,
+        "after_build_passes": 1,
+        "after_append_ms": changes["append"][0],
+        "after_append_moved": changes["append"][1],
+        "after_new_row_ms": changes["new_row"][0],
+        "after_new_row_moved": changes["new_row"][1],
+        "after_insert_front_ms": changes["insert_front"][0],
+        "after_insert_front_moved": changes["insert_front"][1],
+    }
+
+
+def main(sizes=(1_000, 10_000, 50_000)):
+    rng = random.Random(1234)
+    print("before build is one timed pass x children (estimated); "
+          "changes are ms (chips moved) for one added chip")
+    print(f"{'children':>9} | {'before build':>14} | {'after build':>12} | {'scroll before':>13} | "
+          f"{'append after':>18} | {'new row after':>18} | {'insert at 0 after':>18}")
+    for n in sizes:
+        r = run(n, rng)
+        changes = " | ".join(
+            f"{r[f'after_{case}_ms']:>7.2f} ms ({r[f'after_{case}_moved']:>6})"
+            for case in ("append", "new_row", "insert_front"))
+        print(f"{r['children']:>9} | ~{r['before_build_s_estimated']:>7.1f} s est | "
+              f"{r['after_build_ms']:>9.2f} ms | {r['before_scroll_pass_ms']:>10.2f} ms | {changes}")
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(a) for a in sys.argv[1:]) or (1_000, 10_000, 50_000)
+    main(sizes)
@@ -0,0 +1,88 @@
+# bench/stub_server.py
+# Local stand-in for the combine API: POST {"a", "b"} -> {"result"}.
+# HTTP/1.1 with keep-alive, so connection reuse actually shows up.
+import json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubCombineServer:
+    """Runs on a background thread; use as a context manager.
+
+    `delay` adds fixed server-side think time per request, `fail_every` makes
+    every Nth request answer 503 so retry paths get exercised, and pairs in
+    `reject` (either order) get a final 400, like a pair the API can't combine.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_every=0, reject=()):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.reject = {tuple(sorted((a.lower(), b.lower()))) for a, b in reject}
+        self.requests = 0
+        self.connections = 0
+        self.active = 0
+        self.peak_active = 0  # most requests being handled at once
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # else delayed ACKs add ~40ms per kept-alive reply
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._lock:
+                    stub.requests += 1
+                    n = stub.requests
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                try:
+                    status, payload = self._answer(n, body)
+                finally:
+                    # Before replying, or the client's next request can overlap it
+                    with stub._lock:
+                        stub.active -= 1
+                self._reply(status, payload)
+
+            def _answer(self, n, body):
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.fail_every and n % stub.fail_every == 0:
+                    return 503, {"error": "stub says try again"}
+                try:
+                    data = json.loads(body)
+                    a, b = sorted((data["a"].lower(), data["b"].lower()))
+                except Exception:
+                    return 400, {"error": "bad request"}
+                if (a, b) in stub.reject:
+                    return 400, {"error": f"cannot combine {a} and {b}"}
+                return 200, {"result": f"{a}-{b}"}
+
+            def _reply(self, status, payload):
+                out = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/combine"
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -3,6 +3,7 @@ title = Infinite Alchemy
 package.name = infinitealchemy
 package.domain = com.loganlarrabee
 source.dir = .
+source.exclude_dirs = bench, tests
 main = main.py
 version = 1.3.1
 #version.regex = __version__ = ['"]([^'"]*)['"]
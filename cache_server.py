@@ -0,0 +1,164 @@
+# cache_server.py
+# Shared local recipe cache. Speaks the same protocol as the combine API
+# (POST {"a", "b"} -> {"result"}), answers from a SQLite store and forwards
+# misses upstream, so many app instances only ever ask the remote API once
+# per pair. Point the app at it with ALCHEMY_API_URL=http://host:8765/combine
+#   python cache_server.py --db recipe_cache.db --port 8765
+import argparse, asyncio, json, time
+
+from combine_client import CombineClient
+from game_store import SqliteStore
+
+DEFAULT_UPSTREAM = "https://infinite-craft-api.onrender.com/combine"
+
+
+class RecipeCacheServer:
+    """asyncio HTTP/1.1 server with keep-alive; also serves GET /metrics"""
+
+    def __init__(self, store, upstream, workers=8):
+        self.store = store
+        self.client = CombineClient(upstream, max_workers=workers)
+        self.started = time.time()
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.upstream_errors = 0
+        self.bad_requests = 0
+        self.upstream_seconds = 0.0
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "upstream_errors": self.upstream_errors,
+            "coalesced": self.client.coalesced,
+            "retries": self.client.retries,
+            "bad_requests": self.bad_requests,
+            "avg_upstream_ms": 1e3 * self.upstream_seconds / self.misses if self.misses else 0.0,
+            "uptime_s": time.time() - self.started,
+        }
+
+    async def combine(self, a, b):
+        """Returns (status, payload)"""
+        a, b = a.lower(), b.lower()
+        # SQLite calls block (add_recipe commits), so they run off the event loop
+        result = await asyncio.to_thread(self.store.lookup_recipe, a, b)
+        if result is not None:
+            self.hits += 1
+            return 200, {"result": result}
+        self.misses += 1
+        t0 = time.perf_counter()
+        # CombineClient coalesces concurrent misses for the same pair into one request
+        future = self.client.submit(a, b)
+        result, error = await asyncio.wrap_future(future)
+        self.upstream_seconds += time.perf_counter() - t0
+        if result:
+            await asyncio.to_thread(self.store.add_recipe, a, b, result)
+            return 200, {"result": result}
+        self.upstream_errors += 1
+        # Pass the API's own "can't combine these" through, so clients don't
+        # retry it; 502 only when upstream was unreachable or failing
+        if future.status is not None and 400 <= future.status < 500:
+            return future.status, {"error": error or "Unknown error"}
+        return 502, {"error": error or "Unknown error"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                self.requests += 1
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = None
+                if length is None or length < 0:
+                    # No telling where the body ends, so this connection is done
+                    self.bad_requests += 1
+                    status, payload = 400, {"error": "bad Content-Length"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.route(method, path, body)
+                out = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(out)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + out)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == "/metrics":
+            return 200, self.metrics()
+        if method == "POST" and path.rstrip("/").endswith("/combine"):
+            try:
+                data = json.loads(body)
+                a, b = str(data["a"]), str(data["b"])
+            except Exception:
+                self.bad_requests += 1
+                return 400, {"error": "expected JSON body {\"a\": ..., \"b\": ...}"}
+            return await self.combine(a, b)
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        return server
+
+    def close(self):
+        self.client.close()
+        self.store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared local recipe cache for the combine API")
+    parser.add_argument("--db", default="recipe_cache.db")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="max concurrent upstream requests")
+    args = parser.parse_args(argv)
+
+    cache = RecipeCacheServer(SqliteStore(args.db), args.upstream, workers=args.workers)
+
+    async def run():
+        server = await cache.serve(args.host, args.port)
+        print(f"Recipe cache on http://{args.host}:{args.port}/combine -> {args.upstream}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(cache.metrics()))
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
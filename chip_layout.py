@@ -0,0 +1,82 @@
+# chip_layout.py
+# Pure row/column math for the inventory grids. No Kivy imports here so it can
+# be used (and timed) without a window.
+from bisect import bisect_left, bisect_right
+
+
+def column_count(available_width, min_item_width):
+    """How many columns fit in the available width"""
+    return max(1, int(available_width / min_item_width))
+
+
+def row_metrics(heights, cols, min_row_height, spacing):
+    """Lay items out left to right, `cols` per row.
+
+    Returns (row_tops, row_heights) where row_tops[i] is the distance from the
+    top of the content area to the top of row i.
+    """
+    row_tops = []
+    row_heights = []
+    update_row_metrics(row_tops, row_heights, heights, cols, min_row_height, spacing, 0)
+    return row_tops, row_heights
+
+
+def update_row_metrics(row_tops, row_heights, heights, cols, min_row_height, spacing, from_row):
+    """Recompute rows `from_row` onwards in place after an insert/remove.
+
+    Rows above `from_row` are untouched, so changes near the end of the list
+    only cost the rows that actually moved.
+    """
+    from_row = max(0, min(from_row, len(row_tops)))
+    del row_tops[from_row:]
+    del row_heights[from_row:]
+    if from_row:
+        y = row_tops[-1] + row_heights[-1] + spacing
+    else:
+        y = 0
+    for start in range(from_row * cols, len(heights), cols):
+        h = max(min_row_height, max(heights[start:start + cols]))
+        row_tops.append(y)
+        row_heights.append(h)
+        y += h + spacing
+
+
+def content_height(row_tops, row_heights, padding, min_height):
+    """Total height of the grid including padding on both sides"""
+    if not row_tops:
+        return min_height
+    return max(min_height, row_tops[-1] + row_heights[-1] + 2 * padding)
+
+
+def grid_positions(heights, cols, col_width, padding, spacing, min_row_height, min_height):
+    """Positions for every item in a layout whose origin is its bottom-left corner.
+
+    Returns (positions, total_height). Items hang from the top of their row,
+    like FlexGridLayout always did.
+    """
+    row_tops, row_heights = row_metrics(heights, cols, min_row_height, spacing)
+    total_height = content_height(row_tops, row_heights, padding, min_height)
+    top = total_height - padding
+    positions = []
+    for i, h in enumerate(heights):
+        row, col = divmod(i, cols)
+        positions.append((padding + (col * col_width), top - row_tops[row] - h))
+    return positions, total_height
+
+
+def visible_rows(row_tops, row_heights, view_top, view_bottom, overscan=0):
+    """Inclusive (first, last) rows that intersect [view_top, view_bottom].
+
+    Both edges are measured from the top of the content area. Returns
+    (0, -1) when there are no rows.
+    """
+    if not row_tops:
+        return 0, -1
+    first = max(0, bisect_right(row_tops, view_top) - 1)
+    # the row starting above the view may already have ended
+    if row_tops[first] + row_heights[first] < view_top and first + 1 < len(row_tops):
+        first += 1
+    last = max(first, bisect_left(row_tops, view_bottom) - 1)
+    first = max(0, first - overscan)
+    last = min(len(row_tops) - 1, last + overscan)
+    return first, last
@@ -0,0 +1,161 @@
+# combine_client.py
+# One long-lived HTTP client for the combine endpoint instead of a new
+# connection (and TLS handshake) per combine.
+import random, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.util import find_spec
+
+# --- httpx is imported on the first request, not at launch (it's one of the
+# slower imports on a phone); a missing dep shows up as a combine error
+httpx = None
+HTTPX_IMPORT_ERR = None
+
+
+def load_httpx():
+    """Import httpx once; returns the import error, or None if it's usable"""
+    global httpx, HTTPX_IMPORT_ERR
+    if httpx is None and HTTPX_IMPORT_ERR is None:
+        try:
+            import httpx as module
+        except Exception as e:
+            HTTPX_IMPORT_ERR = str(e)
+        else:
+            httpx = module
+    return HTTPX_IMPORT_ERR
+
+
+class CombineClient:
+    """Pooled, keep-alive client plus a small worker pool for combine requests.
+
+    combine() is blocking and safe to call from any thread; submit() runs it on
+    the pool and returns a Future resolving to (result, error), whose `status`
+    is the upstream HTTP status of the last answer (None if it never got
+    through). Identical requests already in flight (A+B, B+A, A+B again) share
+    one Future, and pairs the API just rejected are answered from a short
+    negative cache.
+    """
+
+    def __init__(self, api_url, max_workers=4, attempts=3, timeout=60,
+                 backoff_base=0.5, backoff_cap=8.0, failure_ttl=30.0):
+        self.api_url = api_url
+        self.max_workers = max_workers
+        self.attempts = attempts
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_ttl = failure_ttl
+        self.retries = 0  # total retries so far, handy when debugging a flaky backend
+        self.coalesced = 0  # submits that joined a request already in flight
+        self._lock = threading.Lock()
+        self._inflight = {}  # pair_key -> Future
+        self._failures = {}  # pair_key -> (expires_at, error)
+        self._client = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="combine")
+
+    def _http(self):
+        # Created on first use; httpx.Client is thread safe and keeps connections alive.
+        # Under the lock, or concurrent first requests each make their own pool.
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        http2=find_spec("h2") is not None,
+                        timeout=self.timeout,
+                        limits=httpx.Limits(max_connections=self.max_workers,
+                                            max_keepalive_connections=self.max_workers,
+                                            keepalive_expiry=60),
+                    )
+                client = self._client
+        return client
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter: 0..min(cap, base * 2^attempt)"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def final(status):
+        """Whether an answer with this HTTP status won't change on a retry"""
+        return 400 <= status < 500 and status not in (408, 429)
+
+    @staticmethod
+    def pair_key(a, b):
+        """Order-independent key for a pair"""
+        a, b = a.lower(), b.lower()
+        return (a, b) if a <= b else (b, a)
+
+    def combine(self, a, b):
+        """POST {"a", "b"} and return (result, error); exactly one is None"""
+        result, error, _status = self._combine(a, b)
+        return result, error
+
+    def _combine(self, a, b):
+        """Returns (result, error, status). `status` is the HTTP status of the
+        last answer, None if we never got through (no network)"""
+        import_error = load_httpx()
+        if import_error:
+            return None, import_error, None
+        error = None
+        status = None
+        for attempt in range(self.attempts):
+            if attempt:
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff(attempt - 1))
+            try:
+                resp = self._http().post(self.api_url, json={"a": a, "b": b})
+            except Exception as e:
+                error = f"Request error: {e}"
+                status = None
+                continue
+            status = resp.status_code
+            try:
+                data = resp.json()
+            except Exception:
+                data = {}
+            if resp.status_code == 200 and data.get("result"):
+                return data["result"], None, status
+            error = data.get("error") or f"HTTP {resp.status_code}: {resp.text}"
+            # Client errors won't fix themselves; anything else is worth another go
+            if self.final(status):
+                break
+        return None, error, status
+
+    def submit(self, a, b):
+        key = self.pair_key(a, b)
+        with self._lock:
+            failed = self._failures.get(key)
+            if failed is not None:
+                if failed[0] > time.monotonic():
+                    future = Future()
+                    future.status = failed[2]
+                    future.set_result((None, failed[1]))
+                    return future
+                del self._failures[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._pool.submit(self._run, key, a, b)
+            self._inflight[key] = future
+        return future
+
+    def _run(self, key, a, b):
+        result, error, status = self._combine(a, b)
+        with self._lock:
+            # Set before the Future resolves, so every waiter sees it
+            self._inflight.pop(key).status = status
+            # Only a final answer is cached: no network or a 5xx may be fine next time
+            if result is None and status is not None and self.final(status):
+                now = time.monotonic()
+                if len(self._failures) > 1024:
+                    self._failures = {k: v for k, v in self._failures.items() if v[0] > now}
+                self._failures[key] = (now + self.failure_ttl, error, status)
+        return result, error
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
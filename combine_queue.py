@@ -0,0 +1,125 @@
+# combine_queue.py
+# Staged combines: many pairs queued at once and resolved through the pooled
+# client with at most `max_inflight` outstanding. Results pile up until the
+# UI drains them, so recording, saving and redrawing happen once per batch.
+# Whatever hasn't been drained is kept in a small JSON file, so a queue
+# survives restarts. Kivy-free.
+import json, os, threading
+from collections import deque
+from functools import partial
+
+from combine_client import CombineClient
+
+
+class CombineQueue:
+    """Pairs go in with stage(); drain() hands back (a, b, result, error).
+
+    save() persists every pair not drained yet. Call it after the drained
+    results are recorded, so a crash in between replays them instead of
+    losing them.
+    """
+
+    def __init__(self, client, path=None, max_inflight=4):
+        self.client = client
+        self.path = path
+        self.max_inflight = max_inflight
+        self.total = 0     # staged since the queue was last empty
+        self.finished = 0  # of those, answered either way
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._staged = {}  # pair key -> (a, b), for every pair not drained yet
+        self._pending = deque()
+        self._inflight = 0
+        self._results = []
+        self._closed = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    pairs = json.load(f).get("pairs") or ()
+            except (OSError, ValueError) as e:
+                print(f"Error loading combine queue: {e}")
+                pairs = ()
+            self.stage(pairs, start=False)
+
+    def __len__(self):
+        return len(self._staged)
+
+    def stage(self, pairs, start=True):
+        """Queue pairs not already queued; returns how many were added"""
+        added = 0
+        with self._lock:
+            if not self._staged:
+                self.total = self.finished = self.failed = 0
+            for a, b in pairs:
+                key = CombineClient.pair_key(a, b)
+                if key in self._staged:
+                    continue
+                self._staged[key] = (a, b)
+                self._pending.append((a, b))
+                added += 1
+            self.total += added
+        if start:
+            self.pump()
+        return added
+
+    def pump(self):
+        """Send pending pairs while fewer than max_inflight are out"""
+        while True:
+            with self._lock:
+                if self._closed or self._inflight >= self.max_inflight or not self._pending:
+                    return
+                a, b = self._pending.popleft()
+                self._inflight += 1
+            self.client.submit(a, b).add_done_callback(partial(self._on_result, a, b))
+
+    def _on_result(self, a, b, future):
+        try:
+            result, error = future.result()
+        except Exception as e:  # cancelled on shutdown
+            result, error = None, f"Request error: {e}"
+        with self._lock:
+            self._inflight -= 1
+            self.finished += 1
+            if not result:
+                self.failed += 1
+            self._results.append((a, b, result, error))
+        self.pump()
+
+    def drain(self):
+        """Results since the last drain; their pairs leave the queue"""
+        with self._lock:
+            batch, self._results = self._results, []
+            for a, b, _result, _error in batch:
+                self._staged.pop(CombineClient.pair_key(a, b), None)
+        return batch
+
+    def clear(self):
+        """Drop pairs not sent yet (the ones in flight still finish)"""
+        with self._lock:
+            for a, b in self._pending:
+                self._staged.pop(CombineClient.pair_key(a, b), None)
+            self.total -= len(self._pending)
+            self._pending.clear()
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            pairs = list(self._staged.values())
+        try:
+            if not pairs:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pairs": pairs}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving combine queue: {e}")
+
+    def close(self):
+        """Stop sending; unfinished pairs stay staged for save()"""
+        with self._lock:
+            self._closed = True
@@ -0,0 +1,218 @@
+# explorer.py
+# Background "explore" mode: works through untried pairs from the inventory,
+# sends them through the combine pool at a capped rate and hands results back
+# in batches. Kivy-free, so it also runs headless to warm a recipe cache:
+#   python explorer.py --save path/to/game_data.bin --budget 500 --rate 4
+import argparse, sys, threading, time
+from collections import deque
+from functools import partial
+
+from combine_client import CombineClient
+
+
+class Explorer:
+    """Tries untried pairs until the request budget runs out.
+
+    Pairs are generated anchor by anchor: favorites first, then recent
+    discoveries, then the rest of the inventory; anything discovered while
+    exploring jumps to the front. `lookup(a, b)` says whether a pair is
+    already known. `on_batch(results)` gets lists of (a, b, result, error)
+    from a worker thread, at most `batch_size` at a time; `on_done()` runs on
+    the explorer thread once the run is over.
+    """
+
+    def __init__(self, client, inventory, lookup, on_batch, favorites=(), recent=(),
+                 budget=200, rate=4.0, batch_size=20, on_done=None):
+        self.client = client
+        self.lookup = lookup
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.budget = budget
+        self.rate = rate  # requests per second, 0 for no cap
+        self.batch_size = batch_size
+
+        self.sent = 0
+        self.found = 0
+        self.failed = 0
+        self.discoveries = 0
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._outstanding = 0  # submitted, result not processed yet
+        self._inventory = set(inventory)
+        self._elements = sorted(self._inventory)
+        self._anchors = deque()
+        self._anchored = set()
+        for e in list(sorted(favorites)) + list(recent) + self._elements:
+            self._add_anchor(e)
+        self._seen = set()
+        self._batch = []
+        self._next_send = 0.0
+        self._running = threading.Event()
+        self._running.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _add_anchor(self, element, front=False):
+        if element in self._anchored or element not in self._inventory:
+            return
+        self._anchored.add(element)
+        if front:
+            self._anchors.appendleft(element)
+        else:
+            self._anchors.append(element)
+
+    # ---- Control
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="explorer", daemon=True)
+        self._thread.start()
+        return self
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def stop(self):
+        self._stop.set()
+        self._running.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- Work
+    def candidates(self):
+        """Untried pairs in priority order (generator)"""
+        while True:
+            with self._lock:
+                if not self._anchors:
+                    return
+                anchor = self._anchors.popleft()
+                partners = list(self._elements)
+            for other in partners:
+                key = CombineClient.pair_key(anchor, other)
+                if key in self._seen or self.lookup(anchor, other) is not None:
+                    continue
+                self._seen.add(key)
+                yield anchor, other
+
+    def run(self):
+        while True:
+            for a, b in self.candidates():
+                self._running.wait()
+                if self._stop.is_set() or self.sent >= self.budget:
+                    break
+                with self._cond:
+                    while self._outstanding >= self.client.max_workers:
+                        self._cond.wait()
+                    self._outstanding += 1
+                self._throttle()
+                self.sent += 1
+                self.client.submit(a, b).add_done_callback(partial(self._on_result, a, b))
+            with self._cond:
+                # Out of pairs for now, but results still in flight may discover more
+                while self._outstanding and not self._anchors:
+                    self._cond.wait()
+                if not self._anchors or self._stop.is_set() or self.sent >= self.budget:
+                    while self._outstanding:
+                        self._cond.wait()
+                    break
+        self.flush()
+        if self.on_done is not None:
+            self.on_done()
+
+    def _throttle(self):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+        self._next_send = max(now, self._next_send) + 1.0 / self.rate
+
+    def _on_result(self, a, b, future):
+        try:
+            result, error = future.result()
+        except Exception as e:
+            result, error = None, f"Request error: {e}"
+        ready = None
+        with self._lock:
+            if result:
+                self.found += 1
+                result = result.lower()
+                if result not in self._inventory:
+                    self.discoveries += 1
+                    self._inventory.add(result)
+                    self._elements.append(result)
+                    self._add_anchor(result, front=True)
+            else:
+                self.failed += 1
+            self._batch.append((a, b, result, error))
+            if len(self._batch) >= self.batch_size:
+                ready, self._batch = self._batch, []
+            self._outstanding -= 1
+            self._cond.notify_all()
+        if ready:
+            self.on_batch(ready)
+
+    def flush(self):
+        with self._lock:
+            ready, self._batch = self._batch, []
+        if ready:
+            self.on_batch(ready)
+
+
+# ---- Headless entry point
+def main(argv=None):
+    from game_core import GameCore
+    from game_store import JournalStore, SqliteStore
+
+    parser = argparse.ArgumentParser(description="Explore untried combinations without the UI")
+    parser.add_argument("--save", required=True, help="game_data.bin or .json (or .db with --sqlite)")
+    parser.add_argument("--sqlite", action="store_true", help="save is a SqliteStore database")
+    parser.add_argument("--api", default="https://infinite-craft-api.onrender.com/combine")
+    parser.add_argument("--budget", type=int, default=200, help="max combine requests")
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second (0 = no cap)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    # Through GameCore, so the built-in recipes count as known like in the app
+    store = SqliteStore(args.save) if args.sqlite else JournalStore(args.save)
+    core = GameCore(store, CombineClient(args.api, max_workers=args.workers)).load()
+    if core.load_error is not None:
+        core.close()
+        return 1  # already reported; exploring from the defaults would waste the budget
+
+    def commit(batch):
+        # called from worker threads; one thread at a time is enough here
+        with commit_lock:
+            for a, b, result, _error in batch:
+                if result:
+                    core.record(a, b, result)
+            print(f"sent {explorer.sent}/{args.budget}  found {explorer.found}  "
+                  f"new {explorer.discoveries}  failed {explorer.failed}")
+
+    commit_lock = threading.Lock()
+    explorer = Explorer(core.client, core.inventory, core.lookup, commit, favorites=core.favorites,
+                        budget=args.budget, rate=args.rate, batch_size=args.batch)
+    try:
+        explorer.run()
+    except KeyboardInterrupt:
+        explorer.stop()
+    finally:
+        core.save(wait=True)
+        core.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
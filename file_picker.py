@@ -0,0 +1,122 @@
+# file_picker.py
+# Getting a file in or out of the app somewhere the user can reach it. On
+# Android user_data_dir is app-private, so this goes through the system file
+# picker (Storage Access Framework, no storage permissions needed) and turns
+# the picked document into an ordinary file object. Elsewhere a Kivy file
+# chooser opens on the Downloads folder.
+import os
+from pathlib import Path
+
+from kivy.clock import mainthread
+from kivy.metrics import dp
+from kivy.utils import platform
+
+OPEN_REQUEST, CREATE_REQUEST = 0x4A31, 0x4A32  # startActivityForResult codes
+RESULT_OK = -1  # Activity.RESULT_OK
+
+
+def choose_file(on_chosen, save_as=None):
+    """Ask the user for a file to read, or (with `save_as` as the suggested
+    name) one to write.
+
+    on_chosen(f, error) is called on the Kivy thread with the file open as
+    UTF-8 text, or with f None if the user cancelled or it couldn't be
+    opened. The caller closes f.
+    """
+    if platform == "android":
+        _choose_android(on_chosen, save_as)
+    else:
+        _choose_desktop(on_chosen, save_as)
+
+
+@mainthread
+def _deliver(on_chosen, f, error):
+    on_chosen(f, error)
+
+
+def _choose_android(on_chosen, save_as):
+    from android import activity
+    from jnius import autoclass
+
+    Intent = autoclass("android.content.Intent")
+    PythonActivity = autoclass("org.kivy.android.PythonActivity")
+    request = CREATE_REQUEST if save_as else OPEN_REQUEST
+    intent = Intent(Intent.ACTION_CREATE_DOCUMENT if save_as else Intent.ACTION_OPEN_DOCUMENT)
+    intent.addCategory(Intent.CATEGORY_OPENABLE)
+    if save_as:
+        intent.setType("application/json")
+        intent.putExtra(Intent.EXTRA_TITLE, save_as)
+    else:
+        intent.setType("*/*")  # providers disagree on the type of a .json file
+
+    def on_result(code, result, data):
+        # Runs on the Android UI thread
+        if code != request:
+            return
+        activity.unbind(on_activity_result=on_result)
+        if result != RESULT_OK or data is None:
+            _deliver(on_chosen, None, None)
+            return
+        try:
+            resolver = PythonActivity.mActivity.getContentResolver()
+            pfd = resolver.openFileDescriptor(data.getData(), "wt" if save_as else "r")
+            f = os.fdopen(pfd.detachFd(), "w" if save_as else "r", encoding="utf-8")
+        except Exception as e:  # JavaException or OSError
+            _deliver(on_chosen, None, e)
+            return
+        _deliver(on_chosen, f, None)
+
+    activity.bind(on_activity_result=on_result)
+    PythonActivity.mActivity.startActivityForResult(intent, request)
+
+
+def downloads_dir():
+    downloads = Path.home() / "Downloads"
+    return str(downloads if downloads.is_dir() else Path.home())
+
+
+def _choose_desktop(on_chosen, save_as):
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.button import Button
+    from kivy.uix.filechooser import FileChooserListView
+    from kivy.uix.popup import Popup
+    from kivy.uix.textinput import TextInput
+
+    content = BoxLayout(orientation="vertical", spacing=dp(6))
+    chooser = FileChooserListView(path=downloads_dir(), filters=["*.json"])
+    content.add_widget(chooser)
+    name = None
+    if save_as:
+        name = TextInput(text=save_as, multiline=False, size_hint_y=None, height=dp(36))
+        chooser.bind(selection=lambda _c, sel: sel and setattr(name, "text", os.path.basename(sel[0])))
+        content.add_widget(name)
+    buttons = BoxLayout(orientation="horizontal", spacing=dp(6), size_hint_y=None, height=dp(40))
+    ok = Button(text="Save" if save_as else "Open")
+    cancel = Button(text="Cancel")
+    buttons.add_widget(ok)
+    buttons.add_widget(cancel)
+    content.add_widget(buttons)
+    popup = Popup(title="Export to" if save_as else "Import from", content=content,
+                  size_hint=(0.95, 0.9), auto_dismiss=False)
+
+    def done(_btn):
+        if not save_as and not chooser.selection:
+            return
+        popup.dismiss()
+        try:
+            if save_as:
+                f = open(os.path.join(chooser.path, name.text.strip() or save_as), "w", encoding="utf-8")
+            else:
+                f = open(chooser.selection[0], "r", encoding="utf-8")
+        except OSError as e:
+            on_chosen(None, e)
+            return
+        on_chosen(f, None)
+
+    def cancelled(_btn):
+        popup.dismiss()
+        on_chosen(None, None)
+
+    ok.bind(on_press=done)
+    cancel.bind(on_press=cancelled)
+    popup.open()
@@ -0,0 +1,297 @@
+# game_core.py
+# The game minus the UI: what's been found (recipes, inventory, favorites),
+# where it's saved and how combines go out. CraftingGameApp drives one of
+# these; bench/bench_core.py drives it without a display.
+from collections import deque
+
+from recipe_index import RecipeIndex
+
+STARTING_ELEMENTS = ("fire", "water", "air", "earth")
+
+DEFAULT_RECIPES = {
+    ("fire", "water"): "steam",
+    ("earth", "water"): "mud",
+    ("earth", "plant"): "tree",
+    ("fire", "air"): "smoke",
+    ("air", "water"): "rain",
+    ("air", "earth"): "dust",
+    ("fire", "earth"): "lava",
+    ("mud", "earth"): "soil",
+    ("soil", "water"): "plant",
+    ("lava", "water"): "stone",
+    ("stone", "air"): "sand",
+    ("sand", "water"): "clay",
+    ("clay", "fire"): "brick",
+    ("plant", "water"): "algae",
+    ("algae", "air"): "life",
+    ("life", "air"): "bacteria",
+    ("bacteria", "air"): "virus",
+    ("life", "water"): "fish",
+    ("life", "earth"): "worm",
+    ("worm", "earth"): "insect",
+    ("fish", "air"): "bird",
+    ("bird", "earth"): "chicken",
+    ("chicken", "time"): "dinosaur",
+    ("dinosaur", "meteor"): "extinction",
+    ("life", "clay"): "human",
+    ("human", "air"): "idea",
+    ("human", "earth"): "home",
+    ("human", "water"): "sweat",
+    ("human", "tool"): "builder",
+    ("builder", "stone"): "house",
+    ("house", "fire"): "chimney",
+    ("fire", "tree"): "campfire",
+}
+
+
+class GameCore:
+    """Game state plus its store and combine client (either may be None).
+
+    `sync` is an optional sync.SyncLog; local changes are logged to it so
+    other devices can merge them (see merge()). `graph` is the
+    recipe_graph.RecipeGraph from recipe_graph(), once something asks for it;
+    every recipe added after that goes into it too. `hashes` is likewise an
+    optional sync.StateHashes of the whole state, kept current by every change.
+
+    Everything here runs on the caller's thread. The app only calls in from
+    the UI thread, apart from read_save() on the loader thread.
+    """
+
+    def __init__(self, store=None, client=None):
+        self.store = store
+        self.client = client
+        self.sync = None
+        self.graph = None
+        self.hashes = None
+        self.recipes = RecipeIndex()
+        self.inventory = set()
+        self.favorites = set()
+        self.recent_discoveries = deque(maxlen=50)
+        self.load_error = None  # set by read_save(); nothing is written while it is
+
+    # ---- Loading / saving
+    def read_save(self):
+        """Defaults merged with the save, as (recipes, inventory, favorites).
+
+        Doesn't touch the game state, so it can run on another thread. If
+        the save can't be read this returns the defaults and sets load_error.
+        """
+        self.load_error = None
+        recipes = None
+        inventory = set(STARTING_ELEMENTS)
+        favorites = set()
+        try:
+            state = self.store.load() if self.store else None
+            if state:
+                recipes, saved_inventory, favorites = state
+                inventory |= saved_inventory
+        except Exception as e:
+            print(f"Error loading game: {e}")
+            self.load_error = e
+        if recipes is None:
+            return RecipeIndex(DEFAULT_RECIPES), inventory, favorites
+        # Fill the defaults in around the save (saved results win) instead of
+        # copying a possibly huge save into a fresh index. A lazy store's
+        # recipes aren't in `recipes`, so ask it.
+        if self.store.lazy_recipes:
+            saved = self.store.lookup_recipe
+        else:
+            saved = recipes.get
+        for (a, b), result in DEFAULT_RECIPES.items():
+            if saved(a, b) is None:
+                recipes.add(a, b, result)
+        return recipes, inventory, favorites
+
+    def load(self):
+        self.recipes, self.inventory, self.favorites = self.read_save()
+        self.graph = self.hashes = None
+        return self
+
+    def save(self, wait=False):
+        """Write a full snapshot (in the background unless `wait`) and reset the journal"""
+        if not self.saving():
+            return  # a snapshot of the defaults would replace the unreadable save (and its journal)
+        self.store.compact(self.recipes, self.inventory, self.favorites, wait=wait)
+
+    def snapshot(self):
+        """Copies of (every recipe, inventory, favorites), safe to hand to another thread"""
+        if self.store is not None and self.store.lazy_recipes:
+            recipes = self.store.all_recipes()
+            recipes.update(self.recipes)
+        else:
+            recipes = self.recipes.copy()
+        return recipes, set(self.inventory), set(self.favorites)
+
+    def import_state(self, recipes, inventory, favorites):
+        """Merge another save (e.g. an old game_data.json, see
+        game_store.json_state) into this game; returns (new recipes, new elements).
+
+        Pairs already known keep their result. Like record(), everything new
+        goes to the store and the sync log; follow up with needs_save()/save().
+        """
+        new_recipes = 0
+        for (a, b), result in recipes.items():
+            if self.lookup(a, b) is None and self._add_recipe(a, b, result, None):
+                self._log_recipe(a, b, result)
+                new_recipes += 1
+        new_elements = inventory - self.inventory
+        for element in new_elements:
+            self._add_element(element)
+            self._log_element(element)
+        for element in favorites - self.favorites:
+            self.toggle_favorite(element)
+        return new_recipes, len(new_elements)
+
+    def saving(self):
+        """False after a failed load: changes stay in memory, so the journal
+        the next launch starts from isn't added to"""
+        return self.load_error is None and self.store is not None
+
+    def needs_save(self):
+        # Per-change records are cheap appends; fold them in once in a while
+        return self.saving() and self.store.needs_compaction()
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+        if self.client is not None:
+            self.client.close()
+        if self.sync is not None:
+            self.sync.close()
+
+    # ---- Queries
+    def order_key(self, element):
+        return (element not in self.favorites, element)
+
+    def sorted_inventory(self):
+        """Return inventory sorted with favorites first, then alphabetically"""
+        favorites_list = [elem for elem in self.inventory if elem in self.favorites]
+        non_favorites_list = [elem for elem in self.inventory if elem not in self.favorites]
+        
+        # Sort each group alphabetically
+        favorites_list.sort()
+        non_favorites_list.sort()
+        
+        return favorites_list + non_favorites_list
+
+    def recipe_graph(self):
+        """RecipeGraph over every recipe, built on the first call and kept
+        current by record(), merge() and import_state() after that"""
+        if self.graph is None:
+            from recipe_graph import RecipeGraph  # it imports this module
+            if self.store is not None and self.store.lazy_recipes:
+                index = self.snapshot()[0]  # the recipes are on disk
+            else:
+                index = self.recipes
+            self.graph = RecipeGraph(index)
+        return self.graph
+
+    def lookup(self, a_lower, b_lower):
+        """Known result for a+b in either order, or None"""
+        result = self.recipes.get(a_lower, b_lower)
+        if result is None and self.store is not None and self.store.lazy_recipes:
+            result = self.store.lookup_recipe(a_lower, b_lower)
+        return result
+
+    # ---- Changes
+    def submit(self, a, b):
+        """Send a+b to the API; returns a Future resolving to (result, error)"""
+        return self.client.submit(a, b)
+
+    def record(self, a, b, result):
+        """Add a recipe (and its result, if new) to memory and the journal.
+
+        Returns True for a new discovery. Follow up with needs_save()/save().
+        """
+        a, b, result = a.lower(), b.lower(), result.lower()
+        discovery = result not in self.inventory
+        # lookup() rather than just the index: a lazy store's recipes aren't in it,
+        # and re-adding those would write them out (and sync them) again
+        known = self.lookup(a, b)
+        if known != result and self._add_recipe(a, b, result, known):
+            self._log_recipe(a, b, result)
+        if discovery:
+            self._add_element(result)
+            self._log_element(result)
+            self.recent_discoveries.append(result)
+        return discovery
+
+    def toggle_favorite(self, element):
+        """Flip an element's favorite flag; returns the new state"""
+        element = element.lower()
+        on = element not in self.favorites
+        self._set_favorite(element, on)
+        if self.saving():
+            self.store.set_favorite(element, on)
+            if self.sync is not None:
+                self.sync.set_favorite(element, on)
+        return on
+
+    # Every change to the state, local or merged, goes through these three,
+    # which keep the graph and sync hashes (if any) current with it
+    def _add_recipe(self, a, b, result, known):
+        # `known` is lookup(a, b) beforehand; False if the index already had it
+        if not self.recipes.add(a, b, result):
+            return False
+        if self.graph is not None:
+            self.graph.add(a, b, result)
+        if self.hashes is not None:
+            self.hashes.add_recipe(a, b, result, known)
+        return True
+
+    def _add_element(self, element):
+        self.inventory.add(element)
+        if self.hashes is not None:
+            self.hashes.add_element(element)
+
+    def _set_favorite(self, element, on):
+        if on:
+            self.favorites.add(element)
+        else:
+            self.favorites.discard(element)
+        if self.hashes is not None:
+            self.hashes.set_favorite(element, on)
+
+    def _log_recipe(self, a, b, result):
+        # A local change: to the store, and to the sync log for other devices
+        if self.saving():
+            self.store.add_recipe(a, b, result)
+            if self.sync is not None:
+                self.sync.add_recipe(a, b, result)
+
+    def _log_element(self, element):
+        if self.saving():
+            self.store.add_element(element)
+            if self.sync is not None:
+                self.sync.add_element(element)
+
+    def merge(self, delta):
+        """Merge another device's changes (a sync.py delta).
+
+        Recipes and inventory only grow; when the two sides got different
+        results for a pair, the alphabetically first wins on both. Favorites
+        go to whichever write is later (needs `sync` for the stamps). Merged
+        changes reach the store but not the sync log. Returns (new elements,
+        whether any favorite changed). Follow up with needs_save()/save().
+        """
+        new_elements = []
+        for a, b, result in delta.get("recipes", ()):
+            known = self.lookup(a, b)
+            if (known is None or result < known) and self._add_recipe(a, b, result, known) \
+                    and self.saving():
+                self.store.add_recipe(a, b, result)
+        for element in delta.get("inventory", ()):
+            if element not in self.inventory:
+                self._add_element(element)
+                if self.saving():
+                    self.store.add_element(element)
+                new_elements.append(element)
+        favorites_changed = False
+        for element, on, stamp, device in delta.get("favorites", ()):
+            current = element in self.favorites
+            if self.sync.merge_favorite(element, on, stamp, device, current) and on != current:
+                self._set_favorite(element, on)
+                if self.saving():
+                    self.store.set_favorite(element, on)
+                favorites_changed = True
+        return new_elements, favorites_changed
@@ -0,0 +1,365 @@
+# game_store.py
+# Save-file persistence without rewriting everything on every combine.
+#
+# game_data.json keeps its old format and is now just the latest snapshot.
+# Snapshots written now carry "key_format": 2, meaning '\' and '+' inside
+# names are escaped in the recipe keys; files without it are read unescaped.
+# Changes since then go into game_data.journal, one JSON record per line:
+#   ["r", a, b, result]     new recipe
+#   ["i", element]          new inventory element
+#   ["f", element, 0|1]     favorite toggled off/on
+# Once the journal gets long, compact() writes a fresh snapshot on a background
+# thread (tmp file + os.replace, so a crash never leaves a half-written save)
+# and throws the old journal away.
+#
+# A snapshot path ending in .bin uses the binary format from save_format.py
+# instead; game_data.bin still reads an existing game_data.json (and shares
+# its journal) until the first compaction writes the .bin. From then on the
+# .json is stale, so a store opened on it refuses rather than replay (and
+# compact away) the .bin's journal on top of it.
+import glob, json, os, threading, zlib
+
+from recipe_index import KEY_FORMAT, RecipeIndex, decode_pair_key, encode_pair_key
+from save_format import is_binary, read_snapshot, write_snapshot
+
+
+def json_snapshot(recipes, inventory, favorites):
+    """The game_data.json document for a state"""
+    # Convert tuple keys to string format for JSON compatibility
+    return {
+        "key_format": KEY_FORMAT,
+        "recipes": {encode_pair_key(a, b): result for (a, b), result in recipes.items()},
+        "inventory": sorted(inventory),
+        "favorites": sorted(favorites),
+    }
+
+
+def read_json_snapshot(path):
+    """(RecipeIndex, inventory, favorites) from a game_data.json file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json_state(json.load(f))
+
+
+def json_state(data):
+    """(RecipeIndex, inventory, favorites) from a game_data.json document"""
+    if not isinstance(data, dict):
+        raise ValueError("not a saved game")
+    recipes = RecipeIndex()
+    inventory = set(data.get("inventory") or ())
+    favorites = set(data.get("favorites") or ())
+    escaped = data.get("key_format") == KEY_FORMAT  # older files never escaped
+    for key, result in data.get("recipes", {}).items():
+        try:
+            a, b = decode_pair_key(key, inventory, escaped)
+        except ValueError:
+            print(f"Skipping bad recipe key {key!r}")
+            continue
+        recipes.add(a, b, result)
+    return recipes, inventory, favorites
+
+
+def open_for_append(path):
+    """Open a one-JSON-record-per-line file for appending, after making sure
+    a torn last line from a crash doesn't swallow the next record"""
+    with open(path, "a+b") as f:
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return open(path, "a", encoding="utf-8")
+
+
+def _set_aside(path):
+    """Rename a damaged file to <path>.damaged (or .damaged-2, ...); returns the new name"""
+    target = path + ".damaged"
+    n = 1
+    while os.path.exists(target):
+        n += 1
+        target = f"{path}.damaged-{n}"
+    os.replace(path, target)
+    return target
+
+
+class JournalStore:
+    lazy_recipes = False  # load() returns every recipe
+
+    def __init__(self, snapshot_path, compact_every=500, compress=True, set_aside=False):
+        self.snapshot_path = snapshot_path
+        # rename an unreadable snapshot to .damaged on load; only the app does,
+        # read-only tools leave their input alone. Later loads start over from
+        # the journal alone.
+        self.set_aside = set_aside
+        base, ext = os.path.splitext(snapshot_path)
+        self.binary = ext == ".bin"
+        self.compress = compress  # zlib, binary snapshots only
+        # read when there's no binary snapshot yet
+        self.legacy_json_path = base + ".json" if self.binary else None
+        # a game_data.bin takes this save (and its journal) over at its first compaction
+        self.binary_sibling_path = None if self.binary else base + ".bin"
+        self.journal_path = base + ".journal"
+        # journal being folded into a snapshot right now (or when we crashed)
+        self.compacting_path = base + ".journal.compacting"
+        self.compact_every = compact_every
+        self.pending = 0  # records written since the last compaction
+        self._lock = threading.Lock()
+        self._journal = None
+        self._compactor = None
+
+    # ---- Loading
+    def load(self):
+        """Return (recipes, inventory, favorites) from snapshot + journal.
+
+        recipes is a RecipeIndex. Returns None if nothing has been saved yet.
+        """
+        if self.binary_sibling_path and os.path.exists(self.binary_sibling_path):
+            raise ValueError(f"{self.binary_sibling_path} is the current save (and shares "
+                             f"{self.journal_path}); open that instead of {self.snapshot_path}")
+        paths = [self.snapshot_path]
+        # Once a .bin has been set aside, the .json it replaced is older than the
+        # journal; start from just the journal instead (the .damaged copy stays)
+        if self.legacy_json_path and not glob.glob(glob.escape(self.snapshot_path) + ".damaged*"):
+            paths.append(self.legacy_json_path)
+        state = None
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    # by content, so a JSON file renamed to .bin (or back) still loads
+                    state = read_snapshot(path) if is_binary(path) else read_json_snapshot(path)
+                except (ValueError, zlib.error) as e:  # UnicodeDecodeError is a ValueError
+                    if not self.set_aside:
+                        raise ValueError(f"{path} can't be read ({e})") from e
+                    # Keep it for recovery rather than let the next compaction replace it
+                    raise ValueError(f"{path} can't be read ({e}); moved it to {_set_aside(path)}") from e
+                break
+        found = state is not None
+        recipes, inventory, favorites = state or (RecipeIndex(), set(), set())
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                self.pending += self._replay(path, recipes, inventory, favorites)
+                found = True
+        return (recipes, inventory, favorites) if found else None
+
+    def _replay(self, path, recipes, inventory, favorites):
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash mid-append
+                kind = rec[0]
+                if kind == "r":
+                    recipes.add(rec[1], rec[2], rec[3])
+                elif kind == "i":
+                    inventory.add(rec[1])
+                elif kind == "f":
+                    if rec[2]:
+                        favorites.add(rec[1])
+                    else:
+                        favorites.discard(rec[1])
+                count += 1
+        return count
+
+    # ---- Appending
+    def add_recipe(self, a, b, result):
+        self._append(["r", a, b, result])
+
+    def add_element(self, element):
+        self._append(["i", element])
+
+    def set_favorite(self, element, on):
+        self._append(["f", element, 1 if on else 0])
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self._journal = open_for_append(self.journal_path)
+            self._journal.write(line)
+            self._journal.flush()
+            self.pending += 1
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    # ---- Compaction
+    def compact(self, recipes, inventory, favorites, wait=False):
+        """Fold the journal into a new snapshot of the given state.
+
+        The state is copied here, on the caller's thread; serializing and
+        writing happen in the background unless `wait` is set. Returns False
+        if a previous compaction is still running.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            if not wait:
+                return False
+            self._compactor.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.compacting_path):
+                    # left over from a crash: keep both until the snapshot lands
+                    with open(self.journal_path, "r", encoding="utf-8") as src, \
+                            open(self.compacting_path, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.pending = 0
+        state = (recipes.copy(), set(inventory), set(favorites))
+        self._compactor = threading.Thread(target=self._write_snapshot, args=state, daemon=True)
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+        return True
+
+    def _write_snapshot(self, recipes, inventory, favorites):
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            if self.binary:
+                f = open(tmp_path, "wb")
+            else:
+                f = open(tmp_path, "w", encoding="utf-8")
+            with f:
+                if self.binary:
+                    write_snapshot(f, recipes, inventory, favorites, compress=self.compress)
+                else:
+                    json.dump(json_snapshot(recipes, inventory, favorites), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+        except Exception as e:
+            # The journal is still on disk, so nothing is lost; retry next time
+            print(f"Error compacting save: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+class SqliteStore:
+    """Optional stdlib sqlite3 backend with the same interface as JournalStore.
+
+    Recipes are never loaded up front: load() returns an empty recipe dict and
+    callers ask lookup_recipe() per pair instead, so startup doesn't grow with
+    history. Pairs are stored normalized (a <= b). The first open migrates an
+    existing game_data.bin or .json (+ journal) next to the database.
+
+    The inventory is still read whole. Search, the favorites-first order and
+    the chip grid's row layout all need every name, and names are a small
+    fraction of a save next to its recipes. So there is no per-page inventory
+    query. There is no index on result either, since nothing looks recipes up
+    by result.
+    """
+    lazy_recipes = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS elements (name TEXT PRIMARY KEY) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS favorites (name TEXT PRIMARY KEY) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS recipes (
+        a TEXT NOT NULL, b TEXT NOT NULL, result TEXT NOT NULL,
+        PRIMARY KEY (a, b)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        import sqlite3
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._migrate()
+
+    @staticmethod
+    def _pair(a, b):
+        return (a, b) if a <= b else (b, a)
+
+    def _migrate(self):
+        done = self._db.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+        if done or not self.legacy_json_path:
+            return
+        state = JournalStore(self.legacy_json_path).load()
+        with self._lock, self._db:
+            if state:
+                recipes, inventory, favorites = state
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO recipes (a, b, result) VALUES (?, ?, ?)",
+                    (self._pair(a, b) + (r,) for (a, b), r in recipes.items()))
+                self._db.executemany("INSERT OR IGNORE INTO elements (name) VALUES (?)",
+                                     ((e,) for e in inventory))
+                self._db.executemany("INSERT OR IGNORE INTO favorites (name) VALUES (?)",
+                                     ((e,) for e in favorites))
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')")
+
+    # ---- Loading
+    def load(self):
+        """Return (empty RecipeIndex, inventory, favorites); recipes stay on disk (see lookup_recipe)"""
+        with self._lock:
+            inventory = {row[0] for row in self._db.execute("SELECT name FROM elements")}
+            favorites = {row[0] for row in self._db.execute("SELECT name FROM favorites")}
+        if not inventory and not favorites:
+            return None
+        return RecipeIndex(), inventory, favorites
+
+    def lookup_recipe(self, a, b):
+        """Result of a+b (either order), or None"""
+        with self._lock:
+            row = self._db.execute("SELECT result FROM recipes WHERE a = ? AND b = ?",
+                                   self._pair(a, b)).fetchone()
+        return row[0] if row else None
+
+    def all_recipes(self):
+        """Every stored recipe as a RecipeIndex (for whole-graph tools, not the app)"""
+        index = RecipeIndex()
+        with self._lock:
+            for a, b, result in self._db.execute("SELECT a, b, result FROM recipes"):
+                index.add(a, b, result)
+        return index
+
+    # ---- Writing
+    def add_recipe(self, a, b, result):
+        # REPLACE, as a journal replay would: a synced pair can change result
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO recipes (a, b, result) VALUES (?, ?, ?)",
+                             self._pair(a, b) + (result,))
+
+    def add_element(self, element):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO elements (name) VALUES (?)", (element,))
+
+    def set_favorite(self, element, on):
+        with self._lock, self._db:
+            if on:
+                self._db.execute("INSERT OR IGNORE INTO favorites (name) VALUES (?)", (element,))
+            else:
+                self._db.execute("DELETE FROM favorites WHERE name = ?", (element,))
+
+    def needs_compaction(self):
+        return False  # every change is already its own transaction
+
+    def compact(self, recipes, inventory, favorites, wait=False):
+        """Make sure everything in memory is in the database.
+
+        Only needed for state that never went through add_* (e.g. the
+        built-in starting recipes); cheap because of INSERT OR IGNORE.
+        """
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO recipes (a, b, result) VALUES (?, ?, ?)",
+                                 (self._pair(a, b) + (r,) for (a, b), r in recipes.items()))
+            self._db.executemany("INSERT OR IGNORE INTO elements (name) VALUES (?)",
+                                 ((e,) for e in inventory))
+        return True
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,29 +1,41 @@
 # main.py
-import os, json, threading, textwrap
+import time
+STARTED = time.perf_counter()  # startup trace reference point (ALCHEMY_STARTUP_TRACE=1)
+
+import json, os, threading, textwrap
+from bisect import bisect_left
 from functools import partial
 from pathlib import Path
 
-# --- safe httpx import so missing deps won't crash on launch
-
-HTTPX_IMPORT_ERR = None
-try:
-    import httpx
-except Exception as e:
-    httpx = None
-    HTTPX_IMPORT_ERR = str(e)
-
 from kivy.app import App
 from kivy.clock import Clock
+from kivy.core.text import Label as CoreLabel
 from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
 from kivy.metrics import dp, sp
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.floatlayout import FloatLayout
+from kivy.uix.relativelayout import RelativeLayout
 from kivy.uix.label import Label
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.button import Button
+from kivy.uix.textinput import TextInput
 from kivy.utils import platform
 
+from chip_layout import (column_count, content_height, grid_positions, row_metrics,
+                         update_row_metrics, visible_rows)
+from combine_client import CombineClient
+from combine_queue import CombineQueue
+from explorer import Explorer
+from game_core import GameCore
+from file_picker import choose_file
+from game_store import JournalStore, SqliteStore, json_snapshot, json_state
+from perf import PROFILER, profiled
+from search_index import SearchIndex
+from sync import FolderSync, StateHashes, SyncLog
+from text_cache import LRUCache
+
 
 PRIMARY = (0.16, 0.24, 0.33, 1)
 PRIMARY_ACCENT = (0.22, 0.48, 0.70, 1)
@@ -35,31 +47,64 @@ HIGHLIGHT = (0.84, 0.73, 0.22, 1)
 FAVORITE_COLOR = (0.94, 0.33, 0.31, 1)  # Red for favorite star
 
 FONT_PATH = "fonts/DejaVuSans.ttf"
+LABEL_WIDTH_BUCKET = 16  # px; chips within a bucket share one label texture
+
+class FlexGridLayout(RelativeLayout):
+    """Custom layout that arranges items in a flexible grid with proper spacing.
 
-class FlexGridLayout(FloatLayout):
-    """Custom layout that arranges items in a flexible grid with proper spacing"""
+    Children sit in local coordinates, so moving the layout (scrolling) needs no
+    relayout at all. Any number of add/remove calls or child height changes in
+    one frame collapse into a single pass through Layout._trigger_layout, and
+    children whose slot did not change are left alone.
+    """
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.padding = dp(8)
         self.spacing = dp(8)
         self.min_item_width = dp(80)  # Smaller default width
-        self.bind(size=self.do_layout, pos=self.do_layout)
+        self._slots = {}  # child -> (pos, width) it was last given
+        self._layout_dirty = True
+        self.bind(width=self._mark_dirty)
+        
+    def _mark_dirty(self, *args):
+        self._layout_dirty = True
+        self._trigger_layout()
         
     def add_widget(self, widget, *args, **kwargs):
         super().add_widget(widget, *args, **kwargs)
-        Clock.schedule_once(lambda dt: self.do_layout(), 0.1)
+        widget.bind(height=self._mark_dirty)
+        self._mark_dirty()
+        
+    def add_widgets(self, widgets):
+        """Add many children and lay them out once"""
+        for widget in widgets:
+            super().add_widget(widget)
+            widget.bind(height=self._mark_dirty)
+        self._layout_dirty = True
+        self._trigger_layout.cancel()
+        self.do_layout()
         
     def remove_widget(self, widget, *args, **kwargs):
         super().remove_widget(widget, *args, **kwargs)
-        Clock.schedule_once(lambda dt: self.do_layout(), 0.1)
+        widget.unbind(height=self._mark_dirty)
+        self._slots.pop(widget, None)
+        self._mark_dirty()
         
     def clear_widgets(self, *args, **kwargs):
         super().clear_widgets(*args, **kwargs)
+        self._slots.clear()
+        self._layout_dirty = True
         self.height = dp(50)  # Reset height when cleared
         
+    @profiled(cat="layout")
     def do_layout(self, *args):
+        # Layout re-triggers on our own pos and on children moving; only
+        # adds/removes, our width and child heights actually need a new pass
+        if not self._layout_dirty:
+            return
         if not self.children:
+            self._layout_dirty = False
             self.height = dp(50)
             return
             
@@ -67,59 +112,214 @@ class FlexGridLayout(FloatLayout):
         available_width = self.width - (2 * self.padding)
         if available_width <= 0:
             return
+        self._layout_dirty = False
             
         # Calculate columns based on minimum item width
-        cols = max(1, int(available_width / self.min_item_width))
+        cols = column_count(available_width, self.min_item_width)
         col_width = available_width / cols
         
-        # Position items
-        row = 0
-        col = 0
-        max_row_height = dp(50)  # Smaller default height
-        current_row_height = dp(50)
-        y_offset = 0
-        
         # Sort children by their order (reverse because Kivy adds children in reverse)
-        sorted_children = list(reversed(self.children))
-        
-        for child in sorted_children:
-            # Position the child
-            x = self.x + self.padding + (col * col_width)
-            y = self.top - self.padding - y_offset - child.height
-            
-            child.pos = (x, y)
-            child.width = col_width - self.spacing
-            
-            # Track the tallest item in current row
-            current_row_height = max(current_row_height, child.height)
-            
-            # Move to next column
-            col += 1
-            
-            # If we've filled the row, move to next row
-            if col >= cols:
-                col = 0
-                row += 1
-                y_offset += current_row_height + self.spacing
-                max_row_height = max(max_row_height, current_row_height)
-                current_row_height = dp(50)
+        sorted_children = self.children[::-1]
+        positions, total_height = grid_positions(
+            [child.height for child in sorted_children], cols, col_width,
+            self.padding, self.spacing, dp(50), dp(50))
+        self.height = total_height
         
-        # Set the total height of the layout
-        total_height = y_offset + current_row_height + (2 * self.padding)
-        self.height = max(dp(50), total_height)
+        child_width = col_width - self.spacing
+        slots = self._slots
+        for child, pos in zip(sorted_children, positions):
+            slot = (pos, child_width)
+            if slots.get(child) != slot:
+                slots[child] = slot
+                child.pos = pos
+                child.width = child_width
+
+class RecycleChipGrid(FloatLayout):
+    """Virtualized FlexGridLayout: only rows in view (plus a few rows of overscan)
+    get real chip widgets, which are pooled and rebound as the user scrolls.
+
+    `adapter` supplies create_chip_view(), bind_chip_view(view, element),
+    release_chip_view(view, element) and chip_height(element).
+    """
+
+    def __init__(self, adapter, overscan_rows=2, **kwargs):
+        super().__init__(**kwargs)
+        self.padding = dp(8)
+        self.spacing = dp(8)
+        self.min_item_width = dp(80)
+        self.min_row_height = dp(50)
+        self.overscan_rows = overscan_rows
+        self.adapter = adapter
+        self.data = []
+        self._heights = []
+        self._row_tops = []
+        self._row_heights = []
+        self._cols = 1
+        self._col_width = self.min_item_width
+        self._active = {}  # element -> bound view
+        self._pool = []    # detached views ready for reuse
+        self._rebind_all = False
+        self._height_cache = {}  # element -> chip height; only depends on the label text
+        self.bind(width=self.refresh)
+
+    def _chip_height(self, element):
+        h = self._height_cache.get(element)
+        if h is None:
+            h = self._height_cache[element] = self.adapter.chip_height(element)
+        return h
+
+    def on_parent(self, _widget, parent):
+        if parent is not None and hasattr(parent, 'scroll_y'):
+            parent.bind(scroll_y=self._trigger_layout, height=self._trigger_layout)
+
+    def set_data(self, elements):
+        """Replace the whole list and rebind every visible chip"""
+        self.data = list(elements)
+        self._heights = [self._chip_height(e) for e in self.data]
+        self._rebind_all = True
+        self.refresh()
+
+    def insert_item(self, index, element):
+        """Insert one element; only rows from `index` on are re-measured"""
+        self.data.insert(index, element)
+        self._heights.insert(index, self._chip_height(element))
+        self._refresh_from(index)
+
+    def insert_items(self, items):
+        """Insert (index, element) pairs given in ascending index order, each index
+        final (counting the earlier ones); rows are re-measured once"""
+        if not items:
+            return
+        for index, element in items:
+            self.data.insert(index, element)
+            self._heights.insert(index, self._chip_height(element))
+        self._refresh_from(items[0][0])
+
+    def extend_items(self, elements):
+        """Append elements; only the new rows are measured"""
+        start = len(self.data)
+        self.data.extend(elements)
+        self._heights.extend(self._chip_height(e) for e in elements)
+        self._refresh_from(start)
+
+    def pop_item(self, index):
+        """Remove one element. Its chip (if any) goes back to the pool on the next layout"""
+        element = self.data.pop(index)
+        self._heights.pop(index)
+        self._refresh_from(index)
+        return element
+
+    def _refresh_from(self, index):
+        if self.width - (2 * self.padding) <= 0:
+            return  # first refresh() will measure everything
+        update_row_metrics(self._row_tops, self._row_heights, self._heights, self._cols,
+                           self.min_row_height, self.spacing, index // self._cols)
+        self.height = content_height(self._row_tops, self._row_heights, self.padding, dp(50))
+        self.do_layout()
+
+    def refresh(self, *args):
+        """Recompute rows (needed when data or width changes) then fill the viewport"""
+        available_width = self.width - (2 * self.padding)
+        if available_width <= 0:
+            return
+        self._cols = column_count(available_width, self.min_item_width)
+        self._col_width = available_width / self._cols
+        self._row_tops, self._row_heights = row_metrics(
+            self._heights, self._cols, self.min_row_height, self.spacing)
+        self.height = content_height(self._row_tops, self._row_heights, self.padding, dp(50))
+        self.do_layout()
+
+    def _viewport(self):
+        """Visible band as (top, bottom) offsets from the top of the content area"""
+        sv = self.parent
+        if sv is None or not hasattr(sv, 'scroll_y'):
+            return 0, self.height
+        top = (1 - sv.scroll_y) * max(0, self.height - sv.height)
+        return top - self.padding, top + sv.height - self.padding
+
+    @profiled(cat="layout")
+    def do_layout(self, *args):
+        cols = self._cols
+        view_top, view_bottom = self._viewport()
+        first, last = visible_rows(self._row_tops, self._row_heights,
+                                   view_top, view_bottom, self.overscan_rows)
+        start = first * cols
+        end = min(len(self.data), (last + 1) * cols)
+        wanted = set(self.data[start:end])
+
+        # Free views that scrolled out (or everything, after a data reset)
+        spare = []
+        for element in list(self._active):
+            if self._rebind_all or element not in wanted:
+                view = self._active.pop(element)
+                self.adapter.release_chip_view(view, element)
+                spare.append(view)
+        self._rebind_all = False
+
+        for i in range(start, end):
+            element = self.data[i]
+            view = self._active.get(element)
+            if view is None:
+                if spare:
+                    view = spare.pop()
+                elif self._pool:
+                    view = self._pool.pop()
+                else:
+                    view = self.adapter.create_chip_view()
+                if view.parent is None:
+                    super().add_widget(view)
+                self.adapter.bind_chip_view(view, element)
+                self._active[element] = view
+            row, col = divmod(i, cols)
+            view.width = self._col_width - self.spacing
+            view.pos = (self.x + self.padding + (col * self._col_width),
+                        self.top - self.padding - self._row_tops[row] - view.height)
+
+        for view in spare:
+            super().remove_widget(view)
+            self._pool.append(view)
 
 class CraftingGameApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.api_url = "https://infinite-craft-api.onrender.com/combine"
+        # ALCHEMY_API_URL can point at a shared cache_server.py instead of the remote API
+        self.api_url = os.environ.get("ALCHEMY_API_URL", "https://infinite-craft-api.onrender.com/combine")
+        # Recipes, inventory, favorites, the store and the combine client
+        self.core = GameCore(client=CombineClient(self.api_url))
 
         self.GAME_FILE = None
-        self.recipes = {}
-        self.inventory = set()
-        self.favorites = set()
         self.selected_elements = []
         self.element_buttons = {}
+        self.inventory_order = []  # what the grid shows: favorites first, then alphabetical
+        self.search_index = SearchIndex()
+        self.search_query = ""
+        self.shown_count = None  # matches for search_query, None when not filtering
+        self.explorer = None
+        self.explore_budget = 200  # combine requests per explore run
+        self.explore_rate = 4.0    # requests per second
         self.min_chip_width_dp = 80  # Smaller minimum width
+        self.label_layouts = LRUCache(max_entries=20000)
+        self.label_textures = LRUCache(max_entries=4096, max_cost=32 * 1024 * 1024,
+                                       cost=lambda t: t.width * t.height * 4)
+        self.virtual_inventory = True  # RecycleChipGrid instead of FlexGridLayout
+        self.storage_backend = "journal"  # or "sqlite": recipes stay on disk, looked up per combine
+        self.save_format = "binary"  # journal snapshots as game_data.bin, or "json" for game_data.json
+        self.loaded = False  # save read and merged; nothing may be saved before this
+        self.populate_chunk = 400  # inventory chips added per frame at startup
+        self._populated = None  # chips shown so far while populating, else None
+        self._loader = None
+        self.startup_trace = bool(os.environ.get("ALCHEMY_STARTUP_TRACE"))
+        self._startup_marks = set()
+        self.perf_overlay = None  # built on first toggle (double-tap the title, or F12)
+        self.combine_queue = None  # CombineQueue, once the save is loaded
+        self.queue_parallelism = 4  # combines in flight at once from the queue
+        self._queue_draining = False
+        self._queue_new = 0
+        # ALCHEMY_SYNC_DIR: a folder shared with other devices (see sync.py)
+        self.sync_folder = os.environ.get("ALCHEMY_SYNC_DIR")
+        self.sync_interval = 60  # seconds between sync rounds
+        self.sync = None  # FolderSync, once the save is loaded
+        self._sync_thread = None
 
     def build(self):
         if platform not in ("android", "ios"):
@@ -129,17 +329,12 @@ class CraftingGameApp(App):
         self.title = "Infinite alchemy"
         root = BoxLayout(orientation="vertical", padding=dp(12), spacing=dp(8))  # Reduced spacing
 
-        # storage path
-        user_dir = Path(self.user_data_dir)
-        user_dir.mkdir(parents=True, exist_ok=True)
-        self.GAME_FILE = str(user_dir / "game_data.json")
-        self.load_game()
-
         title = Label(text="Infinite alchemy", font_size=sp(22), bold=True,  # Smaller title
                       color=TEXT, size_hint_y=None, height=dp(30))  # Smaller height
+        title.bind(on_touch_down=self._on_title_touch)
         root.add_widget(title)
 
-        self.status_label = Label(text='Select 2 elements to combine',
+        self.status_label = Label(text='Loading…',
                                   font_size=sp(12), color=TEXT_DIM,  # Smaller font
                                   size_hint_y=None, height=dp(18), font_name=FONT_PATH)  # Smaller height
         root.add_widget(self.status_label)
@@ -154,9 +349,18 @@ class CraftingGameApp(App):
         chip_row.add_widget(self.selected_label2)
         root.add_widget(chip_row)
 
+        self.search_input = TextInput(hint_text="Search elements", multiline=False,
+                                      font_size=sp(13), size_hint_y=None, height=dp(36),
+                                      background_color=SURFACE_LIGHT, foreground_color=TEXT,
+                                      hint_text_color=TEXT_DIM, cursor_color=TEXT)
+        self.search_input.bind(text=self.on_search_text)
+        root.add_widget(self.search_input)
+
         scroll = ScrollView(size_hint=(1, 1), bar_width=dp(4))
-        self.inventory_grid = FlexGridLayout(size_hint_y=None)
-        self.inventory_grid.bind(height=self.inventory_grid.setter('height'))
+        if self.virtual_inventory:
+            self.inventory_grid = RecycleChipGrid(self, size_hint_y=None)
+        else:
+            self.inventory_grid = FlexGridLayout(size_hint_y=None)
         scroll.add_widget(self.inventory_grid)
         root.add_widget(scroll)
 
@@ -166,22 +370,270 @@ class CraftingGameApp(App):
         self.combine_button.bind(on_press=self.combine_elements)
         clear_button = self._button("Clear", SURFACE_LIGHT)
         clear_button.bind(on_press=self.clear_selection)
+        self.explore_button = self._button("Explore", SURFACE_LIGHT, disabled=True)
+        self.explore_button.bind(on_press=self.toggle_explore)
+        self.queue_button = self._button("Queue", SURFACE_LIGHT, disabled=True)
+        self.queue_button.bind(on_press=self.queue_selection)
         actions.add_widget(self.combine_button)
+        actions.add_widget(self.queue_button)
         actions.add_widget(clear_button)
+        actions.add_widget(self.explore_button)
         root.add_widget(actions)
 
+        # Saves in the game_data.json format, to or from wherever the user picks
+        save_row = BoxLayout(orientation="horizontal", spacing=dp(6),
+                             size_hint_y=None, height=dp(34))
+        self.export_button = self._button("Export save", SURFACE_LIGHT, disabled=True)
+        self.export_button.bind(on_press=self.export_save_json)
+        self.import_button = self._button("Import save", SURFACE_LIGHT, disabled=True)
+        self.import_button.bind(on_press=self.import_save_json)
+        save_row.add_widget(self.export_button)
+        save_row.add_widget(self.import_button)
+        root.add_widget(save_row)
+
         self.result_label = Label(text="", font_size=sp(13), color=TEXT,  # Smaller font
                                   size_hint_y=None, height=dp(45), halign='center',  # Smaller height
                                   text_size=(None, None))
         root.add_widget(self.result_label)
 
-        self.update_inventory_display()
+        # The shell goes up now; the save is read off the UI thread and the
+        # inventory filled in over the next frames
+        if self.startup_trace:
+            Window.bind(on_flip=self._first_frame)
+        self._mark_startup("shell built")
+        self._loader = threading.Thread(target=self._load_in_background, name="loader", daemon=True)
+        self._loader.start()
+        Clock.schedule_interval(lambda dt: PROFILER.frame(dt), 0)
+        Window.bind(on_key_down=self._on_key_down)
+        return root
 
-        # If httpx failed to import, show why (won't crash)
-        if HTTPX_IMPORT_ERR:
-            self.result_label.text = f"Network library missing: {HTTPX_IMPORT_ERR}"
+    # ---- Startup
+    def _mark_startup(self, stage):
+        if self.startup_trace and stage not in self._startup_marks:
+            self._startup_marks.add(stage)
+            print(f"[startup] {stage}: {1e3 * (time.perf_counter() - STARTED):.0f} ms")
 
-        return root
+    def _first_frame(self, *args):
+        Window.unbind(on_flip=self._first_frame)
+        self._mark_startup("first frame")
+
+    def _open_store(self):
+        user_dir = Path(self.user_data_dir)
+        user_dir.mkdir(parents=True, exist_ok=True)
+        # game_data.bin picks up an existing game_data.json by itself
+        self.GAME_FILE = str(user_dir / ("game_data.bin" if self.save_format == "binary" else "game_data.json"))
+        if self.storage_backend == "sqlite":
+            # may migrate a legacy JSON save, hence off the UI thread
+            return SqliteStore(str(user_dir / "game_data.db"), legacy_json_path=self.GAME_FILE)
+        return JournalStore(self.GAME_FILE, set_aside=True)
+
+    def _load_in_background(self):
+        # Loader thread: everything that doesn't need widgets, including the
+        # display order and search index for the whole inventory
+        try:
+            store = self._open_store()
+        except Exception as e:
+            Clock.schedule_once(partial(self._load_failed, e), 0)
+            return
+        self.core.store = store
+        if self.sync_folder:
+            self.core.sync = SyncLog(self.GAME_FILE)
+        recipes, inventory, favorites = self.load_game()
+        order = sorted(inventory, key=lambda e: (e not in favorites, e))
+        index = SearchIndex(inventory)
+        hashes = None
+        if self.core.sync is not None and self.core.load_error is None:
+            # One pass over every recipe here; each change keeps it current after that
+            every_recipe = recipes
+            if store.lazy_recipes:
+                every_recipe = store.all_recipes()
+                every_recipe.update(recipes)
+            hashes = StateHashes(every_recipe, inventory, favorites)
+        Clock.schedule_once(partial(self._save_loaded, recipes, inventory, favorites, order, index,
+                                    hashes), 0)
+
+    def _load_failed(self, error, _dt):
+        raise error  # same as failing in build(): nothing can be saved without a store
+
+    def _save_loaded(self, recipes, inventory, favorites, order, index, hashes, _dt):
+        self._mark_startup("save loaded")
+        core = self.core
+        core.recipes, core.inventory, core.favorites = recipes, inventory, favorites
+        core.hashes = hashes
+        self.inventory_order = order
+        self.search_index = index
+        # Nothing gets saved this session if the save couldn't be read
+        self.loaded = core.load_error is None
+        self.explore_button.disabled = False
+        self.export_button.disabled = self.import_button.disabled = not self.loaded
+        self.combine_queue = CombineQueue(self.core.client, os.path.join(self.user_data_dir, "combine_queue.json"),
+                                          max_inflight=self.queue_parallelism)
+        if len(self.combine_queue):
+            self._start_queue()  # left over from the last session
+        if self.core.sync is not None and self.loaded:
+            # not after a failed load: that would merge into and publish the defaults
+            self.sync = FolderSync(self.sync_folder, self.core.sync)
+            Clock.schedule_interval(self.sync_now, self.sync_interval)
+            self.sync_now()
+        if self.search_query:
+            self._apply_search()  # filtered lists are usually short; show them at once
+        else:
+            self._show_inventory(order[:self.populate_chunk])
+            self._populated = min(len(order), self.populate_chunk)
+            Clock.schedule_once(self._populate_step, 1 / 120)
+        if core.load_error is not None:
+            self.result_label.markup = False
+            self.result_label.text = f"Couldn't load the save; nothing from this session will be saved: {core.load_error}"
+        self.update_status()
+
+    def _populate_step(self, *_args):
+        """Add the next chunk of inventory_order to the grid, one chunk per frame"""
+        n = self._populated
+        if n is None:
+            return
+        if n >= len(self.inventory_order):
+            self._stop_populating()
+            return
+        self._append_inventory(self.inventory_order[n:n + self.populate_chunk])
+        self._populated = min(len(self.inventory_order), n + self.populate_chunk)
+        Clock.schedule_once(self._populate_step, 1 / 120)  # > 0 so it lands in the next frame
+
+    def _finish_populating(self):
+        # Anything that edits the grid by index needs it complete first
+        n = self._populated
+        if n is not None:
+            self._append_inventory(self.inventory_order[n:])
+            self._stop_populating()
+
+    def _stop_populating(self):
+        if self._populated is not None:
+            self._populated = None
+            self._mark_startup("inventory interactive")
+
+    # ---- Performance overlay
+    def _on_title_touch(self, label, touch):
+        if label.collide_point(*touch.pos) and touch.is_double_tap:
+            self.toggle_perf_overlay()
+            return True
+        return False
+
+    def _on_key_down(self, _window, key, *args):
+        if key == 293:  # F12
+            self.toggle_perf_overlay()
+            return True
+        return False
+
+    def toggle_perf_overlay(self, *args):
+        if self.perf_overlay is None:
+            self.perf_overlay = BoxLayout(orientation="vertical", size_hint_y=None,
+                                          height=dp(190), spacing=dp(4))
+            self.perf_label = Label(text="", font_size=sp(10), color=TEXT_DIM, halign='left',
+                                    valign='top', font_name=FONT_PATH)
+            self.perf_label.bind(size=lambda l, size: setattr(l, 'text_size', size))
+            buttons = BoxLayout(orientation="horizontal", spacing=dp(6), size_hint_y=None, height=dp(30))
+            export_button = self._button("Export trace", SURFACE_LIGHT)
+            export_button.bind(on_press=self.export_perf_trace)
+            reset_button = self._button("Reset", SURFACE_LIGHT)
+            reset_button.bind(on_press=lambda b: (PROFILER.reset(), self._refresh_perf_overlay()))
+            buttons.add_widget(export_button)
+            buttons.add_widget(reset_button)
+            self.perf_overlay.add_widget(self.perf_label)
+            self.perf_overlay.add_widget(buttons)
+        if self.perf_overlay.parent is None:
+            # right under the title
+            self.root.add_widget(self.perf_overlay, index=len(self.root.children) - 1)
+            self._refresh_perf_overlay()
+            Clock.schedule_interval(self._refresh_perf_overlay, 1.0)
+        else:
+            Clock.unschedule(self._refresh_perf_overlay)
+            self.root.remove_widget(self.perf_overlay)
+
+    def _update_perf_counters(self):
+        PROFILER.count("widgets", sum(1 for _ in self.root.walk()))
+        PROFILER.count("grid_children", len(self.inventory_grid.children))
+        PROFILER.count("label_textures", len(self.label_textures))
+        client = self.core.client
+        PROFILER.count("combine_retries", client.retries)
+        PROFILER.count("combine_coalesced", client.coalesced)
+
+    def _refresh_perf_overlay(self, *_args):
+        self._update_perf_counters()
+        snap = PROFILER.snapshot()
+        f = snap["frames"]
+        lines = [f"frames {f['count']}  recent p50 {f['recent_p50_ms']:.1f} / max "
+                 f"{f['recent_max_ms']:.1f} ms  slow {f['slow']}"]
+        for name, h in snap["spans"].items():
+            name = name.replace("CraftingGameApp.", "")
+            lines.append(f"{name[:26]:<26} {h['count']:>5}x  mean {h['mean_ms']:.1f}  "
+                         f"p95 {h['p95_ms']:.1f}  max {h['max_ms']:.1f} ms")
+        lines.append("  ".join(f"{k} {v}" for k, v in snap["counters"].items()))
+        self.perf_label.text = "\n".join(lines)
+
+    def export_perf_trace(self, *_args):
+        """Write the recorded session as Chrome trace-event JSON into user_data_dir"""
+        self._update_perf_counters()
+        path = os.path.join(self.user_data_dir, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        try:
+            PROFILER.export_chrome_trace(path)
+        except OSError as e:
+            path = f"failed: {e}"
+        self.result_label.markup = False
+        self.result_label.text = f"Trace {path}"
+
+    # ---- JSON export / import (the game_data.json format older versions use)
+    def export_save_json(self, *_args):
+        """Write the whole game as JSON to a file the user picks"""
+        choose_file(self._export_chosen, save_as=time.strftime("alchemy-%Y%m%d-%H%M%S.json"))
+
+    def _export_chosen(self, f, error):
+        if f is None:
+            if error is not None:
+                self._show_message(f"Export failed: {error}")
+            return
+        # copy here, serialize and write there
+        threading.Thread(target=self._write_export, args=(f, self.core.snapshot()),
+                         name="export", daemon=True).start()
+        self._show_message("Exporting…")
+
+    def _write_export(self, f, state):
+        try:
+            with f:
+                json.dump(json_snapshot(*state), f)
+            message = f"Exported {len(state[0])} recipes, {len(state[1])} elements"
+        except (OSError, ValueError) as e:
+            message = f"Export failed: {e}"
+        Clock.schedule_once(partial(self._show_message, message), 0)
+
+    def import_save_json(self, *_args):
+        """Merge a JSON save the user picks (e.g. an old game_data.json) into the game"""
+        choose_file(self._import_chosen)
+
+    def _import_chosen(self, f, error):
+        if f is None:
+            if error is not None:
+                self._show_message(f"Import failed: {error}")
+            return
+        threading.Thread(target=self._read_import, args=(f,), name="import", daemon=True).start()
+        self._show_message("Importing…")
+
+    def _read_import(self, f):
+        try:
+            with f:
+                state = json_state(json.load(f))
+        except (OSError, ValueError) as e:  # UnicodeDecodeError is a ValueError
+            Clock.schedule_once(partial(self._show_message, f"Import failed: {e}"), 0)
+            return
+        Clock.schedule_once(partial(self._import_loaded, state), 0)
+
+    def _import_loaded(self, state, _dt):
+        new_recipes, new_elements = self.core.import_state(*state)
+        self._journal_saved()
+        self.update_inventory_display()  # favorites may have moved too
+        self._show_message(f"Imported {new_recipes} recipes, {new_elements} new elements")
+
+    def _show_message(self, text, *_args):
+        self.result_label.markup = False
+        self.result_label.text = text
 
     # ---- UI helpers
     def _pill(self, txt):
@@ -203,60 +655,115 @@ class CraftingGameApp(App):
         return btn
 
     def _chip(self, element):
-        # Create a container for the element button and favorite star
+        container, btn = self._new_chip()
+        self._bind_chip(container, element)
+        return container, btn
+
+    def _new_chip(self):
+        # Create a container for the element button and favorite star.
+        # The chip is not tied to an element until _bind_chip, so the
+        # virtualized grid can reuse it for a different one later.
         container = BoxLayout(orientation='vertical', size_hint_y=None, spacing=dp(2))  # Reduced spacing
+        container.element = None
         
         # Main element button with auto-sizing
-        btn = Button(text=self._pretty(element), background_normal="", background_down="",
+        # The label is drawn from a cached texture shared with every other
+        # chip showing the same text, so the Button itself has no text
+        btn = Button(text="", background_normal="", background_down="",
                      background_color=SURFACE_LIGHT, color=TEXT, font_size=sp(12),  # Smaller font
                      size_hint_y=None, halign='center', valign='middle')
-        
-        # Auto-size the button based on content
-        self._auto_size_button(btn)
-        btn.bind(width=lambda b, w: self._auto_size_button(b))
-        btn.bind(on_press=partial(self.select_element, element))
+        btn.label_text = ""
+        with btn.canvas.after:
+            Color(1, 1, 1, 1)
+            btn.label_rect = Rectangle(size=(0, 0))
+        btn.bind(width=lambda b, w: self._draw_label(b), pos=lambda b, p: self._place_label(b),
+                 height=lambda b, h: self._place_label(b))
+        btn.bind(on_press=lambda b: self.select_element(container.element, b))
         
         # Favorite star button - smaller
-        is_favorite = element.lower() in self.favorites
-        star_text = "★" if is_favorite else "☆"
-        star_color = FAVORITE_COLOR if is_favorite else TEXT_DIM
-        
-        star_btn = Button(text=star_text, background_normal="", background_down="",
-                         background_color=(0, 0, 0, 0), color=star_color, font_size=sp(14),  # Smaller font
+        star_btn = Button(text="☆", background_normal="", background_down="",
+                         background_color=(0, 0, 0, 0), color=TEXT_DIM, font_size=sp(14),  # Smaller font
                          size_hint_y=None, height=dp(20), halign='center', valign='middle', font_name=FONT_PATH)  # Smaller height
-        star_btn.bind(on_press=partial(self.toggle_favorite, element))
+        star_btn.bind(on_press=lambda b: self.toggle_favorite(container.element, b))
         
         container.add_widget(btn)
         container.add_widget(star_btn)
-        
-        # Set container height to sum of its children
-        container.height = btn.height + star_btn.height + dp(2)  # Include spacing
-        
+        container.element_btn = btn
+        container.star_btn = star_btn
         return container, btn
 
-    def _auto_size_button(self, widget):
-        """Auto-size button based on text content - more compact"""
-        if not widget.text:
-            widget.height = dp(32)  # Smaller minimum height
-            widget.text_size = (widget.width - dp(8), None)  # Less padding
-            return
-        
-        # Set text_size to constrain width but allow height to grow
-        widget.text_size = (widget.width - dp(8), None)
+    def _bind_chip(self, container, element):
+        """Point a (new or recycled) chip at `element`"""
+        container.element = element
+        btn = container.element_btn
+        btn.label_text, btn.height = self._label_layout(element, btn.font_size)
+        btn.background_color = HIGHLIGHT if element in self.selected_elements else SURFACE_LIGHT
+        self._draw_label(btn)
         
-        # Calculate required height based on text - more compact
-        lines = widget.text.count('\n') + 1
-        if hasattr(widget, 'markup') and widget.markup:
-            import re
-            clean_text = re.sub(r'\[.*?\]', '', widget.text)
-            lines = clean_text.count('\n') + 1
+        is_favorite = element.lower() in self.core.favorites
+        container.star_btn.text = "★" if is_favorite else "☆"
+        container.star_btn.color = FAVORITE_COLOR if is_favorite else TEXT_DIM
         
-        # Smaller, more compact sizing
+        # Set container height to sum of its children
+        container.height = btn.height + container.star_btn.height + dp(2)  # Include spacing
+
+    # ---- RecycleChipGrid adapter
+    def create_chip_view(self):
+        return self._new_chip()[0]
+
+    def bind_chip_view(self, view, element):
+        self._bind_chip(view, element)
+        self.element_buttons[element] = view.element_btn
+
+    def release_chip_view(self, view, element):
+        if self.element_buttons.get(element) is view.element_btn:
+            del self.element_buttons[element]
+
+    def chip_height(self, element):
+        """Same height _bind_chip ends up with, without building any widgets"""
+        return self._label_layout(element, sp(12))[1] + dp(20) + dp(2)
+
+    # ---- Chip labels
+    def _label_layout(self, element, font_size):
+        """(wrapped text, button height) for an element's chip, cached"""
+        # _pretty wraps by character count, so neither depends on the chip width;
+        # only the texture is keyed by width
+        key = (element, font_size)
+        layout = self.label_layouts.get(key)
+        if layout is None:
+            text = self._pretty(element)
+            layout = self.label_layouts.put(key, (text, self._text_height(text, font_size)))
+        return layout
+
+    def _label_texture(self, text, font_size, width):
+        bucket = int(width // LABEL_WIDTH_BUCKET)
+        key = (text, font_size, bucket)
+        texture = self.label_textures.get(key)
+        if texture is None:
+            label = CoreLabel(text=text, font_size=font_size, color=TEXT, halign='center',
+                              text_size=(bucket * LABEL_WIDTH_BUCKET - dp(8), None))
+            label.refresh()
+            texture = self.label_textures.put(key, label.texture)
+        return texture
+
+    def _draw_label(self, btn):
+        rect = btn.label_rect
+        if not btn.label_text or btn.width < LABEL_WIDTH_BUCKET + dp(8):
+            rect.texture, rect.size = None, (0, 0)
+            return
+        texture = self._label_texture(btn.label_text, btn.font_size, btn.width)
+        rect.texture, rect.size = texture, texture.size
+        self._place_label(btn)
+
+    def _place_label(self, btn):
+        w, h = btn.label_rect.size
+        btn.label_rect.pos = (int(btn.center_x - w / 2), int(btn.center_y - h / 2))
+
+    def _text_height(self, text, font_size):
+        lines = text.count('\n') + 1
         base_height = dp(32)  # Smaller base
-        line_height = sp(widget.font_size) * 1.1  # Tighter line spacing
-        calculated_height = max(base_height, line_height * lines + dp(8))  # Less padding
-        
-        widget.height = calculated_height
+        line_height = sp(font_size) * 1.1  # Tighter line spacing
+        return max(base_height, line_height * lines + dp(8))  # Less padding
 
     def _pretty(self, name: str) -> str:
         # More aggressive text wrapping for smaller buttons
@@ -274,54 +781,155 @@ class CraftingGameApp(App):
     # ---- Favorites system
     def toggle_favorite(self, element, star_button):
         """Toggle favorite status of an element"""
-        element_lower = element.lower()
-        if element_lower in self.favorites:
-            self.favorites.remove(element_lower)
-            star_button.text = "☆"
-            star_button.color = TEXT_DIM
-        else:
-            self.favorites.add(element_lower)
-            star_button.text = "★"
-            star_button.color = FAVORITE_COLOR
-        
-        self.save_game()
-        self.update_inventory_display()  # Refresh to reorder
+        # Pull the chip out while its sort key still matches the old favorite state.
+        # star_button may get recycled for another element meanwhile, so the star is
+        # redrawn by rebinding the chip rather than edited here.
+        view = self._pop_inventory_chip(element)
+        self.core.toggle_favorite(element)
+        self._journal_saved()
+        self._insert_inventory_chip(element, view)  # Move it to the other section
+        self.update_status()
 
-    def get_sorted_inventory(self):
-        """Return inventory sorted with favorites first, then alphabetically"""
-        favorites_list = [elem for elem in self.inventory if elem in self.favorites]
-        non_favorites_list = [elem for elem in self.inventory if elem not in self.favorites]
-        
-        # Sort each group alphabetically
-        favorites_list.sort()
-        non_favorites_list.sort()
-        
-        return favorites_list + non_favorites_list
+    def _order_key(self, element):
+        return self.core.order_key(element)
 
     # ---- Inventory UI
+    @profiled()
     def update_inventory_display(self):
+        """Full rebuild. Single changes go through _insert/_pop_inventory_chip instead."""
+        self.inventory_order = self.core.sorted_inventory()
+        self.search_index = SearchIndex(self.core.inventory)
+        self._apply_search()
+        self.update_status()
+
+    def _show_inventory(self, elements):
+        if self.virtual_inventory:
+            # Only the visible chips get (re)bound; they manage element_buttons
+            self.inventory_grid.set_data(elements)
+            return
+
         self.inventory_grid.clear_widgets()
         self.element_buttons.clear()
         
         # Use sorted inventory with favorites first
-        for element in self.get_sorted_inventory():
+        containers = []
+        for element in elements:
+            container, btn = self._chip(element)
+            self.element_buttons[element] = btn
+            containers.append(container)
+        self.inventory_grid.add_widgets(containers)  # One layout pass for the lot
+
+    def _append_inventory(self, elements):
+        if self.virtual_inventory:
+            self.inventory_grid.extend_items(elements)
+            return
+        containers = []
+        for element in elements:
             container, btn = self._chip(element)
             self.element_buttons[element] = btn
-            self.inventory_grid.add_widget(container)
+            containers.append(container)
+        self.inventory_grid.add_widgets(containers)
+
+    # ---- Search
+    def on_search_text(self, _input, text):
+        self.search_query = text.strip().lower()
+        self._apply_search()
         self.update_status()
 
+    def _apply_search(self):
+        """Show the inventory filtered by the search box, favorites still first"""
+        self._stop_populating()  # this shows the whole list itself
+        if self.search_query:
+            matches = self.search_index.search(self.search_query)
+            if len(matches) * 8 < len(self.inventory_order):
+                shown = sorted(matches, key=self._order_key)
+            else:  # cheaper to walk the already sorted list
+                shown = [e for e in self.inventory_order if e in matches]
+            self.shown_count = len(shown)
+        else:
+            shown = self.inventory_order
+            self.shown_count = None
+        self._show_inventory(shown)
+
+    def _insert_inventory_chip(self, element, view=None):
+        """Put one element at its sorted spot without touching the other chips.
+
+        `view` is an existing FlexGridLayout chip to re-add (e.g. after a star toggle).
+        """
+        self._finish_populating()
+        pos = bisect_left(self.inventory_order, self._order_key(element), key=self._order_key)
+        self.inventory_order.insert(pos, element)
+        self.search_index.add(element)
+        if self.search_query:
+            self._apply_search()  # the grid shows a filtered list; just redo it
+            return
+        if self.virtual_inventory:
+            self.inventory_grid.insert_item(pos, element)
+            return
+        if view is None:
+            view, btn = self._chip(element)
+            self.element_buttons[element] = btn
+        else:
+            self._bind_chip(view, element)
+        # Kivy keeps children in reverse display order
+        self.inventory_grid.add_widget(view, index=len(self.inventory_grid.children) - pos)
+
+    def _insert_inventory_chips(self, elements):
+        """_insert_inventory_chip for a batch of new elements, with one grid update"""
+        self._finish_populating()
+        items = []
+        # ascending, so each position stays valid as the later ones go in
+        for element in sorted(elements, key=self._order_key):
+            pos = bisect_left(self.inventory_order, self._order_key(element), key=self._order_key)
+            self.inventory_order.insert(pos, element)
+            self.search_index.add(element)
+            items.append((pos, element))
+        if not items:
+            return
+        if self.search_query:
+            self._apply_search()
+        elif self.virtual_inventory:
+            self.inventory_grid.insert_items(items)
+        else:
+            for pos, element in items:
+                view, btn = self._chip(element)
+                self.element_buttons[element] = btn
+                self.inventory_grid.add_widget(view, index=len(self.inventory_grid.children) - pos)
+
+    def _pop_inventory_chip(self, element):
+        """Take one element out of the display order; returns its chip in FlexGridLayout mode"""
+        self._finish_populating()
+        pos = bisect_left(self.inventory_order, self._order_key(element), key=self._order_key)
+        if pos >= len(self.inventory_order) or self.inventory_order[pos] != element:
+            return None
+        self.inventory_order.pop(pos)
+        if self.search_query:
+            return None  # _insert_inventory_chip re-filters
+        if self.virtual_inventory:
+            self.inventory_grid.pop_item(pos)
+            return None
+        view = self.inventory_grid.children[len(self.inventory_order) - pos]
+        self.inventory_grid.remove_widget(view)
+        return view
+
     # ---- Selection / Status
     def select_element(self, element, button):
-        if len(self.selected_elements) < 2:
-            self.selected_elements.append(element)
-            button.background_color = HIGHLIGHT
-            self.selected_label1.markup = True
-            self.selected_label2.markup = True
-            if len(self.selected_elements) == 1:
-                self.selected_label1.text = f"[color=#969696][b]{self._pretty(element)}[/b]"
-            elif len(self.selected_elements) == 2:
-                self.selected_label2.text = f"[color=#969696][b]{self._pretty(element)}[/b]"
-                self.combine_button.disabled = False
+        # Two picks may be the same element (fire + fire); past that, a
+        # selection is for queueing "first with each of the rest"
+        if len(self.selected_elements) >= 2 and element in self.selected_elements:
+            return
+        self.selected_elements.append(element)
+        button.background_color = HIGHLIGHT
+        self.selected_label1.markup = True
+        self.selected_label2.markup = True
+        n = len(self.selected_elements)
+        if n == 1:
+            self.selected_label1.text = f"[color=#969696][b]{self._pretty(element)}[/b]"
+        else:
+            more = f" +{n - 2}" if n > 2 else ""
+            self.selected_label2.text = f"[color=#969696][b]{self._pretty(self.selected_elements[1])}[/b]{more}"
+        self.combine_button.disabled = n != 2
+        self.queue_button.disabled = n < 2 or self.combine_queue is None
         self.update_status()
 
     def clear_selection(self, _btn):
@@ -329,6 +937,7 @@ class CraftingGameApp(App):
         self.selected_label1.text = "[color=#969696]Select first element"
         self.selected_label2.text = "[color=#969696]Select second element"
         self.combine_button.disabled = True
+        self.queue_button.disabled = True
         self.result_label.text = ""
         self.result_label.markup = False
         for btn in self.element_buttons.values():
@@ -341,70 +950,57 @@ class CraftingGameApp(App):
         elif len(self.selected_elements) == 1:
             suffix = f"Selected: {self._pretty(self.selected_elements[0])}"
         else:
-            a, b = self.selected_elements
-            suffix = f"Selected: {self._pretty(a)} + {self._pretty(b)}"
+            a, b, *more = self.selected_elements
+            suffix = f"Selected: {self._pretty(a)} + {self._pretty(b)}" + (f" +{len(more)}" if more else "")
         
-        favorites_count = len(self.favorites)
+        favorites_count = len(self.core.favorites)
         fav_text = f" | ★ {favorites_count}" if favorites_count > 0 else ""
-        self.status_label.text = f"Inventory: {len(self.inventory)} elements{fav_text}"
+        shown_text = f" | {self.shown_count} shown" if self.shown_count is not None else ""
+        queue = self.combine_queue
+        queue_text = f" | queue {queue.finished}/{queue.total}" if queue is not None and len(queue) else ""
+        self.status_label.text = f"Inventory: {len(self.core.inventory)} elements{fav_text}{shown_text}{queue_text}"
 
     # ---- Combine flow
     def combine_elements(self, _btn):
-        if HTTPX_IMPORT_ERR:
-            self.result_label.text = f"Combination failed: {HTTPX_IMPORT_ERR}"
-            return
-            
         a, b = self.selected_elements
         a_lower, b_lower = a.lower(), b.lower()
         
         # Check if we already know this recipe
-        if (a_lower, b_lower) in self.recipes:
-            result = self.recipes[(a_lower, b_lower)]
-            self.combination_done(a, b, result, None, True, 0)
-            return
-
-        # Check if we already know this recipe 2x
-        if (b_lower, a_lower) in self.recipes:
-            result = self.recipes[(b_lower, a_lower)]
+        result = self.lookup_recipe(a_lower, b_lower)
+        if result:
             self.combination_done(a, b, result, None, True, 0)
             return
             
         self.result_label.text = "Combining…"
         self.combine_button.disabled = True
-        threading.Thread(target=self.combine_api_call, args=(a, b), daemon=True).start()
+        self.combine_api_call(a, b)
+
+    def lookup_recipe(self, a_lower, b_lower):
+        """Known result for a+b in either order, or None"""
+        return self.core.lookup(a_lower, b_lower)
 
+    @profiled()
     def combine_api_call(self, a, b):
-        result = None
-        error = None
+        """Send a+b through the pooled client; combination_done gets the answer on the UI thread"""
+        future = self.core.submit(a, b)
+        future.add_done_callback(partial(self._combine_api_done, a, b, time.perf_counter()))
+        return future
+
+    def _combine_api_done(self, a, b, sent, future):
+        PROFILER.record("network.combine", sent, time.perf_counter(), cat="net")
         try:
-            for attempt in range(2):
-                resp = httpx.post(self.api_url, json={"a": a, "b": b}, timeout=60)
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = {}
-                if resp.status_code == 200 and data.get("result"):
-                    result = data["result"]
-                    break
-                error = data.get("error") or f"HTTP {resp.status_code}: {resp.text}"
-                if attempt == 0:
-                    import time; time.sleep(1.2)
-        except Exception as e:
-            error = f"Request error: {e}"
+            result, error = future.result()
+        except Exception as e:  # cancelled on shutdown, or a bug in the worker
+            result, error = None, f"Request error: {e}"
         Clock.schedule_once(partial(self.combination_done, a, b, result, error, False), 0)
 
     def combination_done(self, a, b, result, error, known, _dt):
         if result:
             pretty = self._pretty(result)
-            discovery = result.lower() not in self.inventory #if you just discovered this
-            new = result.lower() in self.inventory and not known #if recipe is new but item is not
-            self.inventory.add(result.lower())
-            
-            # Save the new recipe
-            self.recipes[(a.lower(), b.lower())] = result.lower()
-            
-            self.save_game()
-            self.update_inventory_display()
+            new = result.lower() in self.core.inventory and not known #if recipe is new but item is not
+            discovery = self._record_recipe(a, b, result) #if you just discovered this
+            self._journal_saved()
+            self.update_status()
             self.result_label.markup = True
             if discovery:
                 self.result_label.text = f"[color=#FFD700]New Discovery\n[b]{pretty}[/b]"
@@ -417,84 +1013,182 @@ class CraftingGameApp(App):
             self.result_label.text = f"Combination failed: {error or 'Unknown error'}"
         Clock.schedule_once(lambda dt: self.clear_selection(None), 2.4)
 
-    # ---- Persistence
-    def save_game(self):
-        # Convert tuple keys to string format for JSON compatibility
-        recipes_dict = {}
-        for (a, b), result in self.recipes.items():
-            recipes_dict[f"{a}+{b}"] = result
-        
-        data = {
-            "recipes": recipes_dict, 
-            "inventory": sorted(list(self.inventory)),
-            "favorites": sorted(list(self.favorites))
-        }
-        with open(self.GAME_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f)
+    def _record_recipe(self, a, b, result):
+        """Add a recipe (and its result, if new) to the game and the grid.
 
-    def load_game(self):
-        # Load default starting inventory and recipes
-        self.inventory = {"fire", "water", "air", "earth"}
-        self.favorites = set()
-        
-        # Default recipes
-        self.recipes = {
-            ("fire", "water"): "steam",
-            ("earth", "water"): "mud",
-            ("earth", "plant"): "tree",
-            ("fire", "air"): "smoke",
-            ("air", "water"): "rain",
-            ("air", "earth"): "dust",
-            ("fire", "earth"): "lava",
-            ("mud", "earth"): "soil",
-            ("soil", "water"): "plant",
-            ("lava", "water"): "stone",
-            ("stone", "air"): "sand",
-            ("sand", "water"): "clay",
-            ("clay", "fire"): "brick",
-            ("plant", "water"): "algae",
-            ("algae", "air"): "life",
-            ("life", "air"): "bacteria",
-            ("bacteria", "air"): "virus",
-            ("life", "water"): "fish",
-            ("life", "earth"): "worm",
-            ("worm", "earth"): "insect",
-            ("fish", "air"): "bird",
-            ("bird", "earth"): "chicken",
-            ("chicken", "time"): "dinosaur",
-            ("dinosaur", "meteor"): "extinction",
-            ("life", "clay"): "human",
-            ("human", "air"): "idea",
-            ("human", "earth"): "home",
-            ("human", "water"): "sweat",
-            ("human", "tool"): "builder",
-            ("builder", "stone"): "house",
-            ("house", "fire"): "chimney",
-            ("fire", "tree"): "campfire"
-        }
+        Returns True for a new discovery. Callers follow up with _journal_saved().
+        """
+        discovery = self.core.record(a, b, result)
+        if discovery:
+            self._insert_inventory_chip(result.lower())
+        return discovery
+
+    def _record_batch(self, batch):
+        """Record (a, b, result, error) results with one grid update and one
+        journal check; returns how many were new discoveries"""
+        found = [result.lower() for a, b, result, _error in batch
+                 if result and self.core.record(a, b, result)]
+        self._insert_inventory_chips(found)
+        self._journal_saved()
+        return len(found)
+
+    # ---- Combine queue
+    def queue_selection(self, _btn):
+        """Stage the first selected element with each of the others"""
+        first, *others = self.selected_elements
+        pairs = [(first, other) for other in others
+                 if self.lookup_recipe(first.lower(), other.lower()) is None]
+        known = len(others) - len(pairs)
+        added = self.combine_queue.stage(pairs, start=False)
+        self.combine_queue.save()
+        self.clear_selection(None)
+        self.result_label.text = f"Queued {added}" + (f", {known} already known" if known else "")
+        self._start_queue()
+
+    def _start_queue(self):
+        if not self._queue_draining:
+            self._queue_draining = True
+            self._queue_new = 0
+            Clock.schedule_interval(self._drain_queue, 0.25)
+        self.combine_queue.pump()
+        self.update_status()
+
+    def _drain_queue(self, _dt):
+        # One record/save/refresh per tick, however many results came in
+        queue = self.combine_queue
+        batch = queue.drain()
+        if batch:
+            self._queue_new += self._record_batch(batch)
+            queue.save()
+            self.result_label.markup = False
+            self.result_label.text = (f"Queue {queue.finished}/{queue.total}: {self._queue_new} new"
+                                      + (f", {queue.failed} failed" if queue.failed else ""))
+            self.update_status()
+        if not len(queue):
+            self._queue_draining = False
+            self.update_status()
+            return False
+
+    # ---- Explore mode
+    def toggle_explore(self, _btn):
+        ex = self.explorer
+        if ex is not None and ex.is_alive():
+            if ex.paused:
+                ex.resume()
+                self.explore_button.text = "Pause"
+            else:
+                ex.pause()
+                self.explore_button.text = "Explore"
+            return
+        core = self.core
+        self.explorer = Explorer(core.client, core.inventory, self.lookup_recipe,
+                                 self._explore_batch, favorites=core.favorites,
+                                 recent=reversed(core.recent_discoveries),
+                                 budget=self.explore_budget, rate=self.explore_rate,
+                                 on_done=self._explore_batch)
+        self.explorer.start()
+        self.explore_button.text = "Pause"
+
+    def _explore_batch(self, batch=()):
+        # Explorer worker thread -> UI thread
+        Clock.schedule_once(partial(self._explore_batch_done, list(batch)), 0)
+
+    def _explore_batch_done(self, batch, _dt):
+        new = self._record_batch(batch)
+        self.update_status()
+        ex = self.explorer
+        self.result_label.markup = False
+        self.result_label.text = f"Explored {ex.sent}/{ex.budget} pairs, {ex.discoveries} new"
+        if new:
+            self.result_label.text += f" (+{new})"
+        if not ex.is_alive():
+            self.explore_button.text = "Explore"
+
+    # ---- Sync
+    def sync_now(self, *_args):
+        """One round with the shared folder: read on a thread, merge here, write on a thread"""
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        self._sync_thread = threading.Thread(target=self._sync_pull, name="sync", daemon=True)
+        self._sync_thread.start()
 
+    def _sync_pull(self):
         try:
-            if self.GAME_FILE and os.path.exists(self.GAME_FILE):
-                with open(self.GAME_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # Load inventory
-                inv = data.get("inventory")
-                if inv:
-                    self.inventory = set(inv)
-                
-                # Load favorites
-                fav = data.get("favorites")
-                if fav:
-                    self.favorites = set(fav)
-                
-                # Load recipes
-                recipes_data = data.get("recipes", {})
-                for key, result in recipes_data.items():
-                    a, b = key.split('+')
-                    self.recipes[(a, b)] = result
-        except Exception as e:
-            print(f"Error loading game: {e}")
+            deltas = self.sync.pull()
+        except OSError as e:
+            print(f"Sync failed: {e}")
+            return
+        Clock.schedule_once(partial(self._sync_merge, deltas), 0)
+
+    def _sync_merge(self, deltas, _dt):
+        core = self.core
+        new_elements = []
+        favorites_changed = False
+        for delta in deltas:
+            new, changed = core.merge(delta)
+            core.sync.mark_merged(delta)
+            new_elements += new
+            favorites_changed = favorites_changed or changed
+        if favorites_changed:
+            self.update_inventory_display()  # chips move between the sections
+        else:
+            self._insert_inventory_chips(new_elements)
+        if deltas:
+            self._journal_saved()
+            self.update_status()
+        if new_elements:
+            self.result_label.markup = False
+            self.result_label.text = f"Synced {len(new_elements)} new from other devices"
+        if self.sync.needs_push():
+            mine = core.hashes.digest()
+            # The whole state is only copied when a peer needs an answer from it
+            answers = self.sync.to_answer(mine)
+            state = core.snapshot() if answers else None
+            self._sync_thread = threading.Thread(target=self._sync_push, args=(mine, answers, state),
+                                                 name="sync", daemon=True)
+            self._sync_thread.start()
+
+    @profiled(cat="sync")
+    def _sync_push(self, mine, answers, state):
+        try:
+            self.sync.push(mine, answers, state)
+        except OSError as e:
+            print(f"Sync failed: {e}")
+
+    # ---- Persistence
+    @profiled()
+    def save_game(self, wait=False):
+        """Write a full snapshot (in the background unless `wait`) and reset the journal"""
+        if not self.loaded:
+            return  # a snapshot of the defaults would replace the real save
+        self.core.save(wait=wait)
+
+    def _journal_saved(self):
+        if self.core.needs_save():
+            self.save_game()
+
+    def on_pause(self):
+        self.save_game()
+        return True
+
+    def on_stop(self):
+        if self._loader is not None:
+            self._loader.join()
+        if self.combine_queue is not None:
+            self.combine_queue.close()
+            self._drain_queue(0)
+            self.combine_queue.save()  # whatever is left runs next time
+        self.save_game(wait=True)
+        if self.explorer is not None:
+            self.explorer.stop()
+        if self._sync_thread is not None:
+            self._sync_thread.join()  # unpublished changes stay in the sync log
+        self.core.close()
+
+    @profiled()
+    def load_game(self):
+        """Defaults merged with the save, as (recipes, inventory, favorites); see GameCore.read_save"""
+        return self.core.read_save()
 
 if __name__ == "__main__":
     CraftingGameApp().run()
\ No newline at end of file
@@ -0,0 +1,167 @@
+# perf.py
+# Always-on, low-overhead instrumentation: call counts and timing histograms
+# for the hot paths, frame times, and a ring buffer of trace events that can
+# be exported as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev).
+# Kivy-free; the app feeds it frame times and shows snapshot() in an overlay.
+import json, os, threading, time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+
+# histogram bucket upper bounds, ms (the last bucket is everything slower)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the max seen"""
+        if not self.count:
+            return 0.0
+        need = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= need:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def stats(self):
+        return {"count": self.count, "mean_ms": self.total / self.count if self.count else 0.0,
+                "p50_ms": self.quantile(0.5), "p95_ms": self.quantile(0.95), "max_ms": self.max,
+                "buckets": dict(zip([f"<={b}" for b in BUCKETS_MS] + ["more"], self.buckets))}
+
+
+class Profiler:
+    """Thread-safe; spans can be recorded from any thread.
+
+    Trace events go into a ring buffer (`max_events`), so a long session keeps
+    its most recent history rather than growing without bound.
+    """
+
+    def __init__(self, max_events=50000, max_frames=3600):
+        self.enabled = os.environ.get("ALCHEMY_PROFILE", "1") != "0"
+        self.histograms = {}  # name -> Histogram
+        self.counters = {}    # name -> latest value
+        self.frames = Histogram()
+        self.slow_frames = 0  # frames over 1/30 s
+        self._recent_frames = deque(maxlen=120)
+        self._events = deque(maxlen=max_events)
+        self._frame_events = deque(maxlen=max_frames)
+        self._threads = {}  # tid -> thread name, for the trace metadata
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def record(self, name, start, end, cat="app"):
+        """Add one finished span (perf_counter start/end) to `name`'s histogram and the trace"""
+        if not self.enabled:
+            return
+        ms = (end - start) * 1e3
+        thread = threading.current_thread()
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(ms)
+            self._threads.setdefault(thread.ident, thread.name)
+            self._events.append((name, cat, start, end, thread.ident))
+
+    def count(self, name, value):
+        """Latest value of a gauge (widget count, retries, ...)"""
+        with self._lock:
+            self.counters[name] = value
+
+    def frame(self, dt):
+        """Feed one Clock frame interval, in seconds"""
+        if not self.enabled:
+            return
+        ms = dt * 1e3
+        with self._lock:
+            self.frames.add(ms)
+            self._recent_frames.append(ms)
+            if ms > 1e3 / 30:
+                self.slow_frames += 1
+            self._frame_events.append((time.perf_counter(), ms))
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent_frames)
+            return {
+                "spans": {name: h.stats() for name, h in sorted(self.histograms.items())},
+                "frames": dict(self.frames.stats(), slow=self.slow_frames,
+                               recent_p50_ms=recent[len(recent) // 2] if recent else 0.0,
+                               recent_max_ms=recent[-1] if recent else 0.0),
+                "counters": dict(self.counters),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.frames = Histogram()
+            self.slow_frames = 0
+            self._recent_frames.clear()
+            self._events.clear()
+            self._frame_events.clear()
+
+    # ---- Chrome trace export
+    def trace_events(self):
+        us = lambda t: round((t - self._t0) * 1e6, 1)
+        pid = os.getpid()
+        with self._lock:
+            events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                      for tid, tname in self._threads.items()]
+            events += [{"name": name, "cat": cat, "ph": "X", "ts": us(start),
+                        "dur": round((end - start) * 1e6, 1), "pid": pid, "tid": tid}
+                       for name, cat, start, end, tid in self._events]
+            events += [{"name": "frame_ms", "ph": "C", "ts": us(t), "pid": pid,
+                        "args": {"frame_ms": round(ms, 2)}}
+                       for t, ms in self._frame_events]
+            events += [{"name": name, "ph": "C", "ts": us(time.perf_counter()), "pid": pid,
+                        "args": {name: value}}
+                       for name, value in self.counters.items()]
+        return events
+
+    def export_chrome_trace(self, path):
+        """Write the buffered events as trace-event JSON; returns the path"""
+        data = {"traceEvents": self.trace_events(), "displayTimeUnit": "ms",
+                "otherData": {"snapshot": self.snapshot()}}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+PROFILER = Profiler()
+
+
+def profiled(name=None, cat="app"):
+    """Decorator: time every call of the function into PROFILER"""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record(label, start, time.perf_counter(), cat)
+        return inner
+    return wrap
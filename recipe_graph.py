@@ -0,0 +1,226 @@
+# recipe_graph.py
+# The recipes form a directed hypergraph: each pair (a, b) is an edge into its
+# result. This answers "how do I make X from the starting elements", "what can
+# this set of elements reach" and "which elements lead nowhere", and stays
+# current as recipes are added (see GameCore.recipe_graph). Headless queries:
+#   python recipe_graph.py --save game_data.bin path "steam engine"
+#   python recipe_graph.py --save game_data.bin reachable fire water
+#   python recipe_graph.py --save game_data.bin dead-ends
+import argparse, heapq, sys
+
+from game_core import STARTING_ELEMENTS, GameCore
+
+
+class RecipeGraph:
+    """Shortest crafting paths over a RecipeIndex.
+
+    cost(x) is the number of combines in the cheapest recipe tree for x,
+    found with Knuth's generalization of Dijkstra to hyperedges (an edge
+    fires once both of its inputs have a cost). Shared ingredients are
+    counted once per use in the tree, so path() (which makes each element
+    only once) can be shorter than cost(). add() only touches the costs a
+    new or changed recipe can affect; nothing is rebuilt.
+    """
+
+    def __init__(self, index, start=STARTING_ELEMENTS):
+        self.index = index
+        self.start = {index.intern(s) for s in start}
+        self._uses = {}   # element id -> {other input id: result id}
+        self._cost = {}   # element id -> combines needed
+        self._via = {}    # element id -> (a id, b id) of its cheapest recipe
+        for ia, ib, r in index.id_items():
+            self._link(ia, ib, r)
+        heap = []
+        for s in self.start:
+            self._cost[s] = 0
+            heap.append((0, s))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def _link(self, ia, ib, r):
+        self._uses.setdefault(ia, {})[ib] = r
+        self._uses.setdefault(ib, {})[ia] = r
+
+    def _propagate(self, heap):
+        # Costs only ever go down, so a label-correcting pass in cost order
+        # settles everything downstream of the seeds
+        cost = self._cost
+        while heap:
+            c, u = heapq.heappop(heap)
+            if c > cost[u]:
+                continue
+            for v, r in self._uses.get(u, {}).items():
+                cv = cost.get(v)
+                if cv is None:
+                    continue
+                nc = c + cv + 1
+                if nc < cost.get(r, nc + 1):
+                    cost[r] = nc
+                    self._via[r] = (u, v)
+                    heapq.heappush(heap, (nc, r))
+
+    def add(self, a, b, result):
+        """Add a recipe, or change the result of a known pair.
+
+        Also adds it to the index if the caller hasn't yet.
+        """
+        index = self.index
+        index.add(a, b, result)
+        ia, ib, r = index.intern(a), index.intern(b), index.intern(result)
+        old = self._uses.get(ia, {}).get(ib)
+        if old == r:
+            return
+        self._link(ia, ib, r)
+        heap = []
+        if old is not None and self._via.get(old) in ((ia, ib), (ib, ia)):
+            heap = self._unsettle(old)
+        ca, cb = self._cost.get(ia), self._cost.get(ib)
+        if ca is not None and cb is not None:
+            nc = ca + cb + 1
+            if nc < self._cost.get(r, nc + 1):
+                self._cost[r] = nc
+                self._via[r] = (ia, ib)
+                heap.append((nc, r))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def _unsettle(self, lost_id):
+        """Drop the costs built on `lost_id`'s (now gone) cheapest recipe and
+        re-seed them from their other recipes; returns the seeds for _propagate"""
+        cost, via = self._cost, self._via
+        lost = {lost_id}
+        stack = [lost_id]
+        while stack:
+            u = stack.pop()
+            for v, r in self._uses.get(u, {}).items():
+                if r not in lost and via.get(r) in ((u, v), (v, u)):
+                    lost.add(r)
+                    stack.append(r)
+        for u in lost:
+            del cost[u]
+            del via[u]
+        index = self.index
+        heap = []
+        for u in lost:
+            best = None
+            for a, b in index.producers(index.name(u)):
+                ia, ib = index.id_of(a), index.id_of(b)
+                ca, cb = cost.get(ia), cost.get(ib)
+                if ca is not None and cb is not None and (best is None or ca + cb + 1 < best[0]):
+                    best = (ca + cb + 1, ia, ib)
+            if best is not None:
+                cost[u] = best[0]
+                via[u] = best[1:]
+                heap.append((best[0], u))
+        return heap
+
+    # ---- Queries
+    def cost(self, element):
+        """Combines in the cheapest recipe tree for `element`, None if unreachable"""
+        i = self.index.id_of(element)
+        return None if i is None else self._cost.get(i)
+
+    def path(self, element):
+        """Combines (a, b, result) to make `element` from the start, in order.
+
+        None if unreachable, [] for a starting element.
+        """
+        i = self.index.id_of(element)
+        if i is None or i not in self._cost:
+            return None
+        name = self.index.name
+        steps = []
+        made = set(self.start)
+        stack = [(i, False)]
+        while stack:
+            u, expanded = stack.pop()
+            if u in made:
+                continue
+            a, b = self._via[u]
+            if expanded:
+                made.add(u)
+                steps.append((name(a), name(b), name(u)))
+            else:
+                stack.append((u, True))
+                stack.append((b, False))
+                stack.append((a, False))
+        return steps
+
+    def reachable(self, elements):
+        """Everything that can be made from `elements` with known recipes"""
+        index = self.index
+        reach = {index.id_of(e) for e in elements} - {None}
+        queue = list(reach)
+        while queue:
+            u = queue.pop()
+            for v, r in self._uses.get(u, {}).items():
+                if v in reach and r not in reach:
+                    reach.add(r)
+                    queue.append(r)
+        return {index.name(i) for i in reach}
+
+    def dead_ends(self, elements=None):
+        """Elements that have been tried but never make anything new: every
+        known recipe using them just gives back one of its inputs. Elements
+        with no known uses yet aren't dead ends, just untried. Defaults to all
+        reachable elements."""
+        if elements is None:
+            ids = list(self._cost)
+        else:
+            ids = [i for i in map(self.index.id_of, elements) if i is not None]
+        dead = []
+        for u in ids:
+            uses = self._uses.get(u)
+            if uses and all(r in (u, v) for v, r in uses.items()):
+                dead.append(self.index.name(u))
+        return sorted(dead)
+
+
+# ---- Headless entry point
+def main(argv=None):
+    from game_store import JournalStore, SqliteStore
+
+    parser = argparse.ArgumentParser(description="Query the recipe graph of a save")
+    parser.add_argument("--save", required=True, help="game_data.bin or .json (or .db with --sqlite)")
+    parser.add_argument("--sqlite", action="store_true", help="save is a SqliteStore database")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("path", help="shortest combine sequence to make an element")
+    p.add_argument("element")
+    p = sub.add_parser("reachable", help="everything craftable from a set of elements")
+    p.add_argument("elements", nargs="+")
+    sub.add_parser("dead-ends", help="elements tried but never making anything new")
+    sub.add_parser("stats", help="size of the graph")
+    args = parser.parse_args(argv)
+
+    # Through GameCore, so the built-in recipes are in the graph like in the app
+    core = GameCore(SqliteStore(args.save) if args.sqlite else JournalStore(args.save)).load()
+    if core.load_error is not None:
+        core.close()
+        return 1  # already reported; a graph of just the starting elements would mislead
+    graph = core.recipe_graph()
+    index = graph.index
+    core.close()
+
+    if args.cmd == "path":
+        element = args.element.lower()
+        steps = graph.path(element)
+        if steps is None:
+            print(f"{element}: not reachable from {', '.join(STARTING_ELEMENTS)}")
+            return 1
+        for n, (a, b, r) in enumerate(steps, 1):
+            print(f"{n:>3}. {a} + {b} = {r}")
+        print(f"{len(steps)} combines")
+    elif args.cmd == "reachable":
+        for name in sorted(graph.reachable([e.lower() for e in args.elements])):
+            print(name)
+    elif args.cmd == "dead-ends":
+        for name in graph.dead_ends():
+            print(name)
+    else:
+        print(f"recipes: {len(index)}  elements: {len(index.names())}  "
+              f"reachable: {len(graph.reachable(STARTING_ELEMENTS))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# recipe_index.py
+# Order-independent recipe table. Element names are interned to small ints and
+# each pair is stored once, packed into a single int key, so a lookup is one
+# dict probe and a recipe costs a couple of ints instead of a tuple of strings.
+from array import array
+
+# Saves whose recipe keys escape '\\' and '+' say so with "key_format": KEY_FORMAT
+KEY_FORMAT = 2
+
+
+def encode_pair_key(a, b):
+    """Save-file key for a pair: "a+b", with '\\' and '+' inside names escaped.
+
+    Names without either character encode exactly like the old f"{a}+{b}" keys.
+    """
+    esc = lambda s: s.replace("\\", "\\\\").replace("+", "\\+")
+    return f"{esc(a)}+{esc(b)}"
+
+
+def decode_pair_key(key, known=None, escaped=True):
+    """Inverse of encode_pair_key.
+
+    Old saves (escaped=False) wrote names as they were, so '\\' is just a
+    character there and a name containing '+' is ambiguous; for those pick
+    the split whose halves are both in `known` (or the first one).
+    """
+    if not escaped:
+        return _split_legacy(key, key.split("+"), known)
+    parts = []
+    cur = []
+    saw_escape = False
+    i = 0
+    while i < len(key):
+        ch = key[i]
+        if ch == "\\" and i + 1 < len(key):
+            cur.append(key[i + 1])
+            saw_escape = True
+            i += 2
+            continue
+        if ch == "+":
+            parts.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+        i += 1
+    parts.append("".join(cur))
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    if saw_escape or len(parts) < 2:
+        raise ValueError(f"Bad recipe key: {key!r}")
+    return _split_legacy(key, parts, known)
+
+
+def _split_legacy(key, parts, known):
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    if len(parts) < 2:
+        raise ValueError(f"Bad recipe key: {key!r}")
+    splits = [("+".join(parts[:i]), "+".join(parts[i:])) for i in range(1, len(parts))]
+    if known:
+        for a, b in splits:
+            if a in known and b in known:
+                return a, b
+    return splits[0]
+
+
+class RecipeIndex:
+    """(a, b) -> result, with a+b and b+a being the same recipe.
+
+    Can also build a reverse index from each result to the pairs that make
+    it (see producers()); once built, add() keeps it current.
+    """
+    __slots__ = ("_ids", "_names", "_pairs", "_by_result")
+
+    def __init__(self, recipes=None):
+        self._ids = {}        # name -> id
+        self._names = []      # id -> name
+        self._pairs = {}      # packed (lo << 32 | hi) -> result id
+        self._by_result = None  # result id -> [packed, ...]; built the first time producers() asks
+        if recipes:
+            self.update(recipes)
+
+    @classmethod
+    def from_arrays(cls, names, pairs, results):
+        """Bulk load: `names` by id, packed pair keys (see _pack) and the matching
+        result ids. Any iterables of ints will do, e.g. memoryviews of a file."""
+        index = cls()
+        index._names = list(names)
+        index._ids = dict(zip(index._names, range(len(index._names))))
+        index._pairs = dict(zip(pairs, results))
+        return index
+
+    def to_arrays(self):
+        """(names, pair keys, result ids) for from_arrays, as a list and two arrays"""
+        return list(self._names), array("Q", self._pairs.keys()), array("I", self._pairs.values())
+
+    # ---- Interning
+    def intern(self, name):
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return i
+
+    def name(self, i):
+        return self._names[i]
+
+    def id_of(self, name):
+        """Interned id of `name`, or None"""
+        return self._ids.get(name)
+
+    def names(self):
+        """Every interned name (elements and results)"""
+        return list(self._names)
+
+    @staticmethod
+    def _pack(ia, ib):
+        return (ia << 32) | ib if ia <= ib else (ib << 32) | ia
+
+    def _unpack(self, packed):
+        return self._names[packed >> 32], self._names[packed & 0xFFFFFFFF]
+
+    # ---- Reading
+    def get(self, a, b, default=None):
+        ia = self._ids.get(a)
+        ib = self._ids.get(b)
+        if ia is None or ib is None:
+            return default
+        r = self._pairs.get(self._pack(ia, ib))
+        return default if r is None else self._names[r]
+
+    def __contains__(self, pair):
+        return self.get(*pair) is not None
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def items(self):
+        """((a, b), result) for every recipe, each pair once"""
+        names = self._names
+        for packed, r in self._pairs.items():
+            yield (names[packed >> 32], names[packed & 0xFFFFFFFF]), names[r]
+
+    def id_items(self):
+        """(a_id, b_id, result_id) for every recipe"""
+        for packed, r in self._pairs.items():
+            yield packed >> 32, packed & 0xFFFFFFFF, r
+
+    def producers(self, result):
+        """Every (a, b) pair known to make `result`"""
+        r = self._ids.get(result)
+        if r is None:
+            return []
+        return [self._unpack(p) for p in self._reverse().get(r, ())]
+
+    def _reverse(self):
+        if self._by_result is None:
+            by_result = {}
+            for packed, r in self._pairs.items():
+                by_result.setdefault(r, []).append(packed)
+            self._by_result = by_result
+        return self._by_result
+
+    # ---- Writing
+    def add(self, a, b, result):
+        """Store a recipe; returns False if that exact recipe was already known"""
+        packed = self._pack(self.intern(a), self.intern(b))
+        r = self.intern(result)
+        old = self._pairs.get(packed)
+        if old == r:
+            return False
+        self._pairs[packed] = r
+        by_result = self._by_result
+        if by_result is not None:  # else _reverse() rebuilds it from _pairs
+            if old is not None:
+                by_result[old].remove(packed)
+            by_result.setdefault(r, []).append(packed)
+        return True
+
+    def update(self, recipes):
+        """Add from a dict of (a, b) -> result or another RecipeIndex"""
+        for (a, b), result in recipes.items():
+            self.add(a, b, result)
+
+    def copy(self):
+        """Independent copy, e.g. to write a snapshot from another thread.
+
+        The reverse index isn't copied; producers() rebuilds it if asked.
+        """
+        other = RecipeIndex()
+        other._ids = dict(self._ids)
+        other._names = list(self._names)
+        other._pairs = dict(self._pairs)
+        other._by_result = None
+        return other
@@ -0,0 +1,85 @@
+# search_index.py
+# Inventory search: a sorted list for prefix lookups plus a 3-gram index for
+# substring and fuzzy matches. Both are updated one name at a time as new
+# elements are discovered, so nothing gets rebuilt per keystroke.
+from bisect import bisect_left, insort
+
+
+def _grams(text, n=3):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    def __init__(self, names=()):
+        self._sorted = sorted(set(names))
+        self._names = set(self._sorted)
+        self._grams = {}  # 3-gram -> set of names containing it
+        for name in self._sorted:
+            self._index(name)
+
+    def _index(self, name):
+        for g in _grams(name):
+            self._grams.setdefault(g, set()).add(name)
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def add(self, name):
+        if name in self._names:
+            return
+        self._names.add(name)
+        insort(self._sorted, name)
+        self._index(name)
+
+    def prefix(self, query):
+        """Names starting with `query`, alphabetical"""
+        names = self._sorted
+        lo = bisect_left(names, query)
+        # Walk rather than bisect to query + some "largest" character: names can
+        # hold any code point (emoji included), so no such character is safe
+        hi = lo
+        while hi < len(names) and names[hi].startswith(query):
+            hi += 1
+        return names[lo:hi]
+
+    def substring(self, query):
+        """Set of names containing `query`"""
+        if len(query) < 3:
+            # too short for a 3-gram; a plain scan of a few thousand names is still quick
+            return {name for name in self._sorted if query in name}
+        postings = [self._grams.get(g) for g in _grams(query)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {name for name in candidates if query in name}
+
+    def fuzzy(self, query, min_share=0.5, limit=50):
+        """Names sharing at least `min_share` of the query's 3-grams, best first"""
+        grams = _grams(query)
+        if not grams:
+            return []
+        counts = {}
+        for g in grams:
+            for name in self._grams.get(g, ()):
+                counts[name] = counts.get(name, 0) + 1
+        need = max(1, int(len(grams) * min_share))
+        hits = [name for name, c in counts.items() if c >= need]
+        hits.sort(key=lambda name: (-counts[name], len(name), name))
+        return hits[:limit]
+
+    def search(self, query):
+        """Set of names matching `query`.
+
+        One or two characters match as a prefix (type-ahead); longer queries
+        match anywhere in the name, falling back to fuzzy matches if nothing does.
+        """
+        query = query.strip().lower()
+        if not query:
+            return set(self._names)
+        if len(query) < 3:
+            return set(self.prefix(query))
+        found = self.substring(query)
+        if not found:
+            found = set(self.fuzzy(query))
+        return found
@@ -0,0 +1,630 @@
+# sync.py
+# Syncing one game between devices through a shared folder (Syncthing, a
+# network drive, a USB stick carried back and forth). Kivy-free.
+#
+# Merge rules, so devices agree whatever order changes arrive in:
+#   recipes and inventory only ever grow (a union), and a pair two devices
+#   got different results for keeps the alphabetically first one everywhere
+#   favorites are last-writer-wins per element, by (stamp, device, on)
+#
+# Each device logs its own changes (<save>.sync.log, versions 1, 2, ...) and
+# publishes them as deltas. Anything the logs don't cover (history from
+# before sync was on, a pruned delta, a crash between the two) is found with
+# content hashes: each device publishes a few KB of per-bucket hashes of its
+# whole state (kept current change by change, see StateHashes), and once the
+# deltas can't explain a difference, a peer whose buckets differ writes out
+# just its items in those buckets.
+#
+#   <folder>/<device>/digest.json            version, hashes, versions read of each peer
+#   <folder>/<device>/<from>-<to>.json.gz    that device's changes from..to
+#   <folder>/<device>/to-<peer>.json.gz      its items in the buckets where <peer> differs
+#
+#   python sync.py run game_data.bin /path/to/shared/folder
+#   python sync.py export game_data.bin --since 120 -o changes.json.gz
+#   python sync.py digest game_data.bin
+import argparse, base64, gzip, hashlib, json, os, sys, threading, time, uuid
+from array import array
+
+from game_store import open_for_append
+
+FORMAT = 1
+# hash buckets per kind, as bits; the digest is 4 bytes a bucket
+BUCKET_BITS = {"recipes": 12, "inventory": 10, "favorites": 6}
+M64 = (1 << 64) - 1
+
+
+# ---- Content hashes
+def _name_hash(name):
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(x):
+    # splitmix64 finalizer
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & M64
+    return x ^ (x >> 31)
+
+
+class _Hasher:
+    """64-bit item hashes; element names are hashed once each"""
+
+    def __init__(self, recipes):
+        self.recipes = recipes
+        self.names = recipes.names()
+        self.ids = [_name_hash(n) for n in self.names]
+        self.by_name = dict(zip(self.names, self.ids))
+
+    def name(self, name):
+        h = self.by_name.get(name)
+        return _name_hash(name) if h is None else h
+
+    def recipe_hashes(self):
+        """Hash of every recipe, the same on every device (_mix inlined: this
+        is most of the time a digest takes)"""
+        ids = self.ids
+        mixed = [_mix(h) for h in ids]
+        for ia, ib, ir in self.recipes.id_items():
+            # + so a+b and b+a hash alike
+            x = ((ids[ia] + ids[ib]) & M64) ^ mixed[ir]
+            x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & M64
+            x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & M64
+            yield x ^ (x >> 31)
+
+    def recipe_items(self):
+        """(hash, (a, b), result) for every recipe"""
+        names = self.names
+        for h, (ia, ib, ir) in zip(self.recipe_hashes(), self.recipes.id_items()):
+            yield h, (names[ia], names[ib]), names[ir]
+
+    def element(self, element, salt):
+        return _mix(self.name(element) ^ salt)
+
+
+INVENTORY_SALT, FAVORITE_SALT = 0x1, 0x2
+
+
+def _bucket(h, kind):
+    return h >> (64 - BUCKET_BITS[kind])
+
+
+class StateHashes:
+    """The per-bucket hashes of digest(), kept current as items come and go.
+
+    Each bucket is an XOR of item hashes, so an item goes in or out with one
+    XOR: filling it is a pass over the whole state, after that each change
+    costs about as much as hashing one name.
+    """
+
+    def __init__(self, recipes=None, inventory=(), favorites=()):
+        self.tables = {kind: array("I", bytes(4 << bits)) for kind, bits in BUCKET_BITS.items()}
+        self.counts = dict.fromkeys(BUCKET_BITS, 0)
+        if recipes is not None:
+            hasher = _Hasher(recipes)
+            self._fold("recipes", hasher.recipe_hashes())
+            self._fold("inventory", (hasher.element(e, INVENTORY_SALT) for e in inventory))
+            self._fold("favorites", (hasher.element(e, FAVORITE_SALT) for e in favorites))
+
+    def _fold(self, kind, hashes, step=1):
+        table = self.tables[kind]
+        shift = 64 - BUCKET_BITS[kind]
+        n = 0
+        for h in hashes:
+            table[h >> shift] ^= h & 0xFFFFFFFF
+            n += 1
+        self.counts[kind] += step * n
+
+    @staticmethod
+    def _recipe_hash(a, b, result):
+        # the same as _Hasher.recipe_hashes
+        return _mix(((_name_hash(a) + _name_hash(b)) & M64) ^ _mix(_name_hash(result)))
+
+    # ---- Changes (GameCore calls these, for local and merged changes alike)
+    def add_recipe(self, a, b, result, old=None):
+        """A new recipe, or `old` -> `result` for a pair that changed result"""
+        if old is not None:
+            self._fold("recipes", (self._recipe_hash(a, b, old),), -1)
+        self._fold("recipes", (self._recipe_hash(a, b, result),))
+
+    def add_element(self, element):
+        self._fold("inventory", (_mix(_name_hash(element) ^ INVENTORY_SALT),))
+
+    def set_favorite(self, element, on):
+        self._fold("favorites", (_mix(_name_hash(element) ^ FAVORITE_SALT),), 1 if on else -1)
+
+    def digest(self):
+        """What digest() gives for the current state; cheap (a few KB of hashing)"""
+        out = {}
+        for kind, table in self.tables.items():
+            if sys.byteorder != "little":
+                table = array("I", table)
+                table.byteswap()
+            raw = table.tobytes()
+            out[kind] = {"count": self.counts[kind],
+                         "top": hashlib.blake2b(raw, digest_size=8).hexdigest(),
+                         "buckets": base64.b64encode(raw).decode("ascii")}
+        return out
+
+
+def digest(recipes, inventory, favorites):
+    """Order-independent hashes of a whole state: per kind, an XOR of the
+    item hashes in each bucket, plus the item count"""
+    return StateHashes(recipes, inventory, favorites).digest()
+
+
+def diff_buckets(mine, theirs):
+    """{kind: set of bucket numbers} where two digests disagree; empty when in sync"""
+    out = {}
+    for kind in BUCKET_BITS:
+        a, b = mine.get(kind), theirs.get(kind)
+        if a is None or b is None:
+            out[kind] = set(range(1 << BUCKET_BITS[kind]))
+            continue
+        if a["top"] == b["top"]:
+            continue
+        ta, tb = array("I"), array("I")
+        ta.frombytes(base64.b64decode(a["buckets"]))
+        tb.frombytes(base64.b64decode(b["buckets"]))
+        if len(ta) != len(tb):
+            out[kind] = set(range(1 << BUCKET_BITS[kind]))
+            continue
+        out[kind] = {i for i, (x, y) in enumerate(zip(ta, tb)) if x != y}
+    return {kind: buckets for kind, buckets in out.items() if buckets}
+
+
+def state_delta(log, recipes, inventory, favorites, buckets=None):
+    """A delta with everything in a state, or only what falls in `buckets`
+    ({kind: bucket numbers}, see diff_buckets)"""
+    hasher = _Hasher(recipes)
+    want = (lambda kind, h: True) if buckets is None else \
+        (lambda kind, h: _bucket(h, kind) in buckets.get(kind, ()))
+    delta = log.delta("state")
+    delta["recipes"] = [[a, b, result] for h, (a, b), result in hasher.recipe_items()
+                        if want("recipes", h)]
+    delta["inventory"] = sorted(e for e in inventory if want("inventory", hasher.element(e, INVENTORY_SALT)))
+    # Favorites by register, so unfavoriting travels too
+    registers = {e: (on, stamp, device) for e, (on, stamp, device) in log.registers().items()
+                 if e not in favorites}
+    registers.update((e, log.register(e, True)) for e in favorites)
+    delta["favorites"] = [[e, on, stamp, device] for e, (on, stamp, device) in sorted(registers.items())
+                          if want("favorites", hasher.element(e, FAVORITE_SALT))]
+    return delta
+
+
+# ---- This device's log
+class SyncLog:
+    """This device's side of sync, kept next to the save.
+
+    <save>.sync.log has one JSON record per local change, numbered by
+    version after `log_start`; records get trimmed once published.
+    <save>.sync.json holds the device id, how far it's published, the
+    versions read from each peer and the favorite registers. Changes merged
+    from other devices are never logged here, so they don't echo back.
+    """
+
+    def __init__(self, save_path):
+        base = os.path.splitext(save_path)[0]
+        self.state_path = base + ".sync.json"
+        self.log_path = base + ".sync.log"
+        state = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading sync state: {e}")
+        self.device = state.get("device") or uuid.uuid4().hex[:12]
+        self.log_start = state.get("log_start", 0)  # versions up to this were trimmed
+        self.published = state.get("published", 0)
+        self.seen = state.get("seen", {})              # peer -> its last version merged here
+        self.reconciled = state.get("reconciled", {})  # peer -> `made` of its last to-<us> delta merged
+        self.favorites = state.get("favorites", {})    # element -> [on, stamp, device]
+        self.clock = state.get("clock", 0)
+        self._lock = threading.Lock()
+        self._log = None
+        self.version = self.log_start
+        if os.path.exists(self.log_path):
+            # the last few records may be newer than the state file
+            for rec in self._records(self.log_start):
+                self.version += 1
+                if rec[0] == "f":
+                    _kind, element, on, stamp, device = rec
+                    self.favorites[element] = [on, stamp, device]
+                    self.clock = max(self.clock, stamp)
+
+    def _records(self, since):
+        """Logged records with versions after `since`"""
+        version = self.log_start
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash mid-append
+                version += 1
+                if version > since:
+                    yield rec
+
+    # ---- Local changes (GameCore calls these)
+    def add_recipe(self, a, b, result):
+        self._append(["r", a, b, result])
+
+    def add_element(self, element):
+        self._append(["i", element])
+
+    def set_favorite(self, element, on):
+        with self._lock:
+            stamp = self.clock = max(self.clock + 1, int(time.time() * 1000))
+            self.favorites[element] = [bool(on), stamp, self.device]
+        self._append(["f", element, bool(on), stamp, self.device])
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._log is None:
+                self._log = open_for_append(self.log_path)
+            self._log.write(line)
+            self._log.flush()
+            self.version += 1
+
+    # ---- Favorites
+    def register(self, element, current):
+        """(on, stamp, device) for an element; (current, 0, "") if never toggled since sync was on"""
+        return tuple(self.favorites.get(element) or (current, 0, ""))
+
+    def registers(self):
+        with self._lock:
+            return dict(self.favorites)
+
+    def merge_favorite(self, element, on, stamp, device, current):
+        """Take another device's write if it's later; returns True if it won"""
+        with self._lock:
+            on, mine = bool(on), self.register(element, current)
+            if (stamp, device, on) <= (mine[1], mine[2], mine[0]):
+                return False
+            self.favorites[element] = [on, stamp, device]
+            self.clock = max(self.clock, stamp)
+            return True
+
+    # ---- Deltas
+    def delta(self, kind, start=None, end=None):
+        return {"format": FORMAT, "kind": kind, "device": self.device,
+                "from": start, "to": self.version if end is None else end,
+                "made": int(time.time() * 1000), "recipes": [], "inventory": [], "favorites": []}
+
+    def export(self, since):
+        """This device's changes after version `since`, or None if the log
+        doesn't reach back that far (send a state_delta instead)"""
+        with self._lock:
+            if since < self.log_start:
+                return None
+            if self._log is not None:
+                self._log.flush()
+            delta = self.delta("log", since, self.version)
+            if since >= self.version or not os.path.exists(self.log_path):
+                return delta
+            inventory = set()
+            for i, rec in enumerate(self._records(since)):
+                if since + i >= self.version:
+                    break
+                if rec[0] == "r":
+                    delta["recipes"].append(rec[1:])
+                elif rec[0] == "i":
+                    inventory.add(rec[1])
+                elif rec[0] == "f":
+                    delta["favorites"].append(rec[1:])
+            delta["inventory"] = sorted(inventory)
+        return delta
+
+    def trim(self, upto):
+        """Forget records up to version `upto` (they've been published)"""
+        with self._lock:
+            if upto <= self.log_start:
+                return
+            keep = []
+            if os.path.exists(self.log_path):
+                keep = [json.dumps(rec, ensure_ascii=False) + "\n" for rec in self._records(upto)]
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            tmp_path = self.log_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(keep)
+            os.replace(tmp_path, self.log_path)
+            self.log_start = upto
+        self.save()
+
+    def mark_merged(self, delta):
+        """Note a peer's delta as merged, so it isn't read again"""
+        peer = delta["device"]
+        with self._lock:
+            if delta["kind"] == "log":
+                self.seen[peer] = max(self.seen.get(peer, 0), delta["to"])
+            else:
+                self.reconciled[peer] = max(self.reconciled.get(peer, 0), delta["made"])
+                self.seen[peer] = max(self.seen.get(peer, 0), delta["to"])
+
+    def save(self):
+        with self._lock:
+            state = {"device": self.device, "log_start": self.log_start, "published": self.published,
+                     "seen": self.seen, "reconciled": self.reconciled,
+                     "favorites": self.favorites, "clock": self.clock}
+            tmp_path = self.state_path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                print(f"Error saving sync state: {e}")
+
+    def close(self):
+        self.save()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+# ---- Delta files
+def write_delta(path, delta):
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(delta, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_delta(path):
+    """The delta in a file, or None if it's unreadable (half-copied, newer format)"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            delta = json.load(f)
+    except (OSError, EOFError, ValueError) as e:
+        print(f"Skipping sync file {path}: {e}")
+        return None
+    if delta.get("format") != FORMAT:
+        print(f"Skipping sync file {path}: format {delta.get('format')}")
+        return None
+    return delta
+
+
+# ---- Folder transport
+class FolderSync:
+    """One device's view of the shared folder.
+
+    pull() only reads files, push() only writes this device's own; neither
+    touches game state, so both can run off the UI thread. In between, the
+    caller merges the pulled deltas (GameCore.merge) and calls mark_merged.
+    """
+
+    def __init__(self, folder, log):
+        self.folder = folder
+        self.log = log
+        self.own_dir = os.path.join(folder, log.device)
+        os.makedirs(self.own_dir, exist_ok=True)
+        self.peers = {}     # peer -> its digest.json, as of the last pull
+        self._answered = {}  # peer -> (its digest version, our digest) we last wrote to-<peer> for
+        self._gaps = set()  # peers whose unread deltas can't all be read (pruned, damaged)
+        self._dirty = True  # something pulled since the last push
+
+    def _peer_dirs(self):
+        try:
+            names = sorted(os.listdir(self.folder))
+        except OSError:
+            return []
+        return [n for n in names if n != self.log.device and os.path.isdir(os.path.join(self.folder, n))]
+
+    @staticmethod
+    def _segments(path):
+        """[(from, to, file)] of a device's published deltas, oldest first"""
+        out = []
+        for name in os.listdir(path):
+            if name.endswith(".json.gz") and not name.startswith("to-"):
+                try:
+                    start, end = map(int, name[:-len(".json.gz")].split("-"))
+                except ValueError:
+                    continue
+                out.append((start, end, os.path.join(path, name)))
+        return sorted(out)
+
+    def pull(self):
+        """Deltas from other devices not merged here yet, oldest first"""
+        deltas = []
+        for peer in self._peer_dirs():
+            path = os.path.join(self.folder, peer)
+            info = self._read_json(os.path.join(path, "digest.json"))
+            if info is not None and info != self.peers.get(peer):
+                self.peers[peer] = info
+                self._dirty = True
+            seen = self.log.seen.get(peer, 0)
+            reach = seen  # how far their deltas can be read without a gap
+            for start, end, file in self._segments(path):
+                if end <= seen:
+                    continue
+                # a gap (pruned before we first looked) is left to the hashes
+                delta = read_delta(file)
+                if delta is not None:
+                    deltas.append(delta)
+                    if start <= reach:
+                        reach = max(reach, end)
+            if info is not None and reach < info.get("version", 0):
+                self._gaps.add(peer)
+            else:
+                self._gaps.discard(peer)
+            answer = os.path.join(path, f"to-{self.log.device}.json.gz")
+            if os.path.exists(answer):
+                delta = read_delta(answer)
+                if delta is not None and delta["made"] > self.log.reconciled.get(peer, 0):
+                    deltas.append(delta)
+        self._dirty = self._dirty or bool(deltas)
+        return deltas
+
+    def needs_push(self):
+        """False when neither side moved since the last push"""
+        return self._dirty or self.log.version != self.log.published
+
+    def to_answer(self, mine):
+        """{peer: buckets} for the peers the next push should answer, given
+        this device's digest (see StateHashes.digest).
+
+        Only differences the deltas can't explain get an answer: while either
+        side still has the other's deltas to read (and they're all there),
+        those fix it. An answer needs the whole state (GameCore.snapshot), so
+        this keeps that to real gaps rather than every change."""
+        log = self.log
+        out = {}
+        starts = None
+        for peer, info in self.peers.items():
+            theirs = info.get("digest") or {}
+            buckets = diff_buckets(mine, theirs)
+            if not buckets:
+                continue
+            key = (info.get("version"), json.dumps(theirs, sort_keys=True), json.dumps(mine, sort_keys=True))
+            if self._answered.get(peer) == key:
+                continue  # they haven't moved since our last answer
+            if log.seen.get(peer, 0) < info.get("version", 0) and peer not in self._gaps:
+                continue  # we haven't merged all of theirs yet
+            read = info.get("seen", {}).get(log.device, 0)
+            if read < log.version:
+                if starts is None:
+                    starts = [start for start, _end, _file in self._segments(self.own_dir)]
+                # the next push publishes from log.published on
+                if read >= log.published or any(start <= read for start in starts):
+                    continue  # they haven't read all of ours yet
+            out[peer] = buckets
+        return out
+
+    def push(self, mine, answers=None, state=None):
+        """Publish local changes and this device's digest (StateHashes.digest),
+        and write `answers` (from to_answer) out of `state`, a copy of
+        (recipes, inventory, favorites) from GameCore.snapshot. Returns
+        {"published": n records, "answered": [peers], "in_sync": [peers]}."""
+        log = self.log
+        self._dirty = False
+        out = {"published": 0, "answered": [], "in_sync": []}
+        delta = log.export(log.published)
+        if delta is not None and delta["to"] > log.published:
+            write_delta(os.path.join(self.own_dir, f"{delta['from']}-{delta['to']}.json.gz"), delta)
+            out["published"] = delta["to"] - delta["from"]
+            log.published = delta["to"]
+            log.trim(log.published)
+        self._write_json(os.path.join(self.own_dir, "digest.json"),
+                         {"format": FORMAT, "device": log.device, "version": log.published,
+                          "seen": log.seen, "digest": mine})
+        for peer, info in self.peers.items():
+            if not diff_buckets(mine, info.get("digest") or {}):
+                out["in_sync"].append(peer)
+        for peer, buckets in (answers or {}).items():
+            info = self.peers[peer]
+            theirs = info.get("digest") or {}
+            key = (info.get("version"), json.dumps(theirs, sort_keys=True), json.dumps(mine, sort_keys=True))
+            answer = state_delta(log, *state, buckets)
+            answer["kind"] = "reconcile"
+            answer["to"] = log.published  # what the peer can skip of our deltas
+            write_delta(os.path.join(self.own_dir, f"to-{peer}.json.gz"), answer)
+            self._answered[peer] = key
+            out["answered"].append(peer)
+        self._prune()
+        log.save()
+        return out
+
+    def _prune(self):
+        # Drop deltas every known peer has read; anyone new catches up by hashes
+        if not self.peers:
+            return
+        read = min(info.get("seen", {}).get(self.log.device, 0) for info in self.peers.values())
+        for _start, end, file in self._segments(self.own_dir):
+            if end <= read:
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+def sync_once(core, folder):
+    """One full round for a GameCore with a SyncLog: pull, merge, push, save.
+    Returns (new elements, push summary)."""
+    transport = FolderSync(folder, core.sync)
+    new_elements = []
+    for delta in transport.pull():
+        new, _favorites_changed = core.merge(delta)
+        core.sync.mark_merged(delta)
+        new_elements += new
+    if core.hashes is None:
+        core.hashes = StateHashes(*core.snapshot())
+    mine = core.hashes.digest()
+    answers = transport.to_answer(mine)
+    summary = transport.push(mine, answers, core.snapshot() if answers else None)
+    core.save(wait=True)
+    return new_elements, summary
+
+
+# ---- Command line
+def main(argv=None):
+    from game_core import GameCore
+    from game_store import JournalStore
+
+    parser = argparse.ArgumentParser(description="Sync saves between devices through a shared folder")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="one sync round with the shared FOLDER")
+    p.add_argument("save", help="game_data.bin or game_data.json")
+    p.add_argument("folder")
+    p = sub.add_parser("export", help="this device's changes since a version, as a delta file")
+    p.add_argument("save")
+    p.add_argument("--since", type=int, default=0)
+    p.add_argument("-o", "--out", required=True)
+    p = sub.add_parser("merge", help="merge a delta file into the save")
+    p.add_argument("save")
+    p.add_argument("delta")
+    p = sub.add_parser("digest", help="print the save's content hashes")
+    p.add_argument("save")
+    args = parser.parse_args(argv)
+
+    core = GameCore(JournalStore(args.save)).load()
+    if core.load_error is not None:
+        core.close()
+        return 1  # already reported; don't publish or merge against the defaults
+    core.sync = SyncLog(args.save)
+    try:
+        if args.cmd == "run":
+            new, summary = sync_once(core, args.folder)
+            print(json.dumps(dict(summary, device=core.sync.device, new_elements=len(new),
+                                  recipes=len(core.recipes), inventory=len(core.inventory))))
+        elif args.cmd == "export":
+            delta = core.sync.export(args.since)
+            if delta is None:  # older than the log; everything it could be missing
+                delta = state_delta(core.sync, *core.snapshot())
+            write_delta(args.out, delta)
+            print(f"{args.out}: {delta['kind']} delta to version {delta['to']}, "
+                  f"{len(delta['recipes'])} recipes, {len(delta['inventory'])} elements")
+        elif args.cmd == "merge":
+            delta = read_delta(args.delta)
+            if delta is None:
+                return 1
+            new, _favorites_changed = core.merge(delta)
+            core.sync.mark_merged(delta)
+            core.save(wait=True)
+            print(f"{len(new)} new elements")
+        else:
+            d = digest(*core.snapshot())
+            print(json.dumps({kind: {"count": v["count"], "top": v["top"]} for kind, v in d.items()}))
+    finally:
+        core.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# tests/test_combine_client.py
+# CombineClient against the local stub server: in-flight coalescing and the
+# short negative cache for pairs the API rejected.
+#   python -m pytest -q tests
+import os, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from combine_client import CombineClient
+from stub_server import StubCombineServer
+
+
+@pytest.fixture
+def client_for():
+    clients = []
+
+    def make(url, **kwargs):
+        kwargs.setdefault("backoff_base", 0.001)
+        clients.append(CombineClient(url, **kwargs))
+        return clients[-1]
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_both_orders_of_a_pair_share_one_request(client_for):
+    with StubCombineServer(delay=0.2) as stub:
+        client = client_for(stub.url)
+        first = client.submit("Fire", "Water")
+        second = client.submit("water", "fire")
+        assert second is first
+        assert first.result(timeout=5) == ("fire-water", None)
+        assert stub.requests == 1 and client.coalesced == 1
+
+        # Once it's done the next submit is a new request
+        assert client.submit("fire", "water").result(timeout=5) == ("fire-water", None)
+        assert stub.requests == 2
+
+
+def test_rejected_pair_is_answered_from_the_negative_cache_until_it_expires(client_for):
+    with StubCombineServer(reject=[("fire", "fire")]) as stub:
+        client = client_for(stub.url, failure_ttl=0.3)
+        future = client.submit("fire", "fire")
+        result, error = future.result(timeout=5)
+        assert result is None and "cannot combine" in error
+        assert future.status == 400
+        assert stub.requests == 1 and client.retries == 0  # a 400 isn't retried
+
+        cached = client.submit("FIRE", "fire")
+        assert cached.done() and cached.result() == (None, error)
+        assert cached.status == 400
+        assert stub.requests == 1
+
+        time.sleep(0.35)
+        assert client.submit("fire", "fire").result(timeout=5) == (None, error)
+        assert stub.requests == 2
+
+
+def test_server_errors_are_not_negatively_cached(client_for):
+    with StubCombineServer(fail_every=1) as stub:
+        client = client_for(stub.url, attempts=2)
+        future = client.submit("fire", "water")
+        assert future.result(timeout=5) == (None, "stub says try again")
+        assert future.status == 503
+        assert stub.requests == 2
+
+        assert client.submit("fire", "water").result(timeout=5)[0] is None
+        assert stub.requests == 4
+
+        stub.fail_every = 0
+        assert client.submit("fire", "water").result(timeout=5) == ("fire-water", None)
+
+
+def test_transport_errors_are_not_negatively_cached(client_for):
+    with StubCombineServer() as stub:
+        url = stub.url
+    # The stub is gone, so nothing answers on its port any more
+    client = client_for(url, attempts=2, timeout=5)
+    future = client.submit("fire", "water")
+    result, error = future.result(timeout=10)
+    assert result is None and error.startswith("Request error")
+    assert future.status is None
+
+    again = client.submit("fire", "water")
+    assert again is not future
+    assert again.result(timeout=10)[0] is None
+    assert client.retries == 2  # one retry per request: both went out
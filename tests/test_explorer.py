@@ -0,0 +1,63 @@
+# tests/test_explorer.py
+# Explorer against the local stub server: budget, known pairs, cancelling.
+#   python -m pytest -q tests
+import os, sys, threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from combine_client import CombineClient
+from explorer import Explorer
+from stub_server import StubCombineServer
+
+INVENTORY = ["air", "earth", "fire", "water", "steam", "mud"]
+
+
+def explore(stub, known=None, workers=4, **kwargs):
+    client = CombineClient(stub.url, max_workers=workers)
+    known = known or {}
+    results = []
+    done = threading.Event()
+    explorer = Explorer(client, INVENTORY, lambda a, b: known.get(CombineClient.pair_key(a, b)),
+                        results.extend, rate=0, on_done=done.set, **kwargs)
+    return explorer, client, results, done
+
+
+def test_stays_within_budget_and_skips_known_pairs():
+    known = {CombineClient.pair_key(a, b): "x" for a, b in
+             [("fire", "water"), ("earth", "water"), ("fire", "fire"), ("mud", "air")]}
+    with StubCombineServer() as stub:
+        explorer, client, results, done = explore(stub, known, budget=15, batch_size=4)
+        try:
+            explorer.run()
+        finally:
+            client.close()
+        assert done.is_set()
+        assert explorer.sent == stub.requests == len(results) == 15
+    tried = [CombineClient.pair_key(a, b) for a, b, _result, _error in results]
+    assert len(set(tried)) == len(tried)
+    assert not set(tried) & set(known)
+    assert all(result == "-".join(key) for key, (_a, _b, result, _e) in zip(tried, results))
+    assert explorer.found == 15 and explorer.failed == 0
+
+
+def test_stop_ends_the_run_and_hands_back_what_was_sent():
+    with StubCombineServer(delay=0.05) as stub:
+        explorer, client, results, done = explore(stub, budget=1000, workers=2, batch_size=1)
+        try:
+            explorer.start()
+            assert done.wait(0.3) is False  # still going
+            explorer.pause()
+            explorer.stop()
+            explorer.join(5)
+        finally:
+            client.close()
+        assert not explorer.is_alive() and done.is_set()
+        assert 0 < explorer.sent < 1000
+        # Everything already sent was waited for and passed on
+        assert len(results) == explorer.sent == stub.requests
@@ -0,0 +1,188 @@
+# tests/test_game_store.py
+# JournalStore: snapshots, journal replay, compaction and recovery from a
+# crash or a damaged save.
+#   python -m pytest -q tests
+import json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from game_core import GameCore
+from game_store import JournalStore, json_snapshot
+from recipe_index import RecipeIndex
+
+
+def write_json_save(path, recipes, inventory=(), favorites=()):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(json_snapshot(RecipeIndex(recipes), set(inventory), set(favorites)), f)
+
+
+def test_damaged_binary_save_is_set_aside_and_later_loads_start_from_the_journal(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    # The .json the .bin replaced, then a .bin that got damaged, then later changes
+    write_json_save(str(tmp_path / "game_data.json"), {("fire", "water"): "stale"}, ["stale"])
+    with open(path, "wb") as f:
+        f.write(b"ALCH" + b"\0" * 40)
+    store = JournalStore(path, set_aside=True)
+    store.add_recipe("fire", "stone", "magma")
+    store.add_element("magma")
+    store.close()
+
+    with pytest.raises(ValueError):
+        JournalStore(path, set_aside=True).load()
+    assert os.path.exists(path + ".damaged") and not os.path.exists(path)
+
+    recipes, inventory, _favorites = JournalStore(path, set_aside=True).load()
+    assert recipes.get("stone", "fire") == "magma"
+    assert inventory == {"magma"}
+    assert recipes.get("fire", "water") is None  # not from the stale .json
+    assert os.path.exists(path + ".damaged")
+
+
+def test_nothing_is_journaled_after_a_failed_load(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    with open(path, "wb") as f:
+        f.write(b"ALCH" + b"\0" * 40)
+    core = GameCore(JournalStore(path, set_aside=True)).load()
+    assert core.load_error is not None
+    core.record("fire", "stone", "magma")
+    core.toggle_favorite("magma")
+    assert not core.needs_save()
+    core.save(wait=True)
+    core.close()
+    assert not os.path.exists(str(tmp_path / "game_data.journal"))
+    assert not os.path.exists(path)
+
+    core = GameCore(JournalStore(path, set_aside=True)).load()
+    assert core.load_error is None
+    assert core.lookup("fire", "water") == "steam"  # defaults
+    assert "magma" not in core.inventory
+    core.close()
+
+
+def test_sqlite_known_recipes_are_not_written_again_and_saved_results_win(tmp_path):
+    from game_store import SqliteStore
+    from sync import SyncLog
+
+    path = str(tmp_path / "game_data.db")
+    core = GameCore(SqliteStore(path)).load()
+    core.record("fire", "water", "hot water")  # replaces a default
+    core.record("fire", "stone", "magma")
+    core.close()
+
+    core = GameCore(SqliteStore(path)).load()
+    core.sync = SyncLog(str(tmp_path / "game_data.bin"))
+    version = core.sync.version
+    assert core.lookup("water", "fire") == "hot water"
+    assert not core.record("stone", "fire", "magma")
+    assert core.sync.version == version
+    assert core.recipes.get("fire", "stone") is None  # still only on disk
+    core.close()
+
+
+@pytest.mark.parametrize("name", ["game_data.bin", "game_data.json"])
+def test_journal_replays_on_top_of_the_snapshot(tmp_path, name):
+    path = str(tmp_path / name)
+    store = JournalStore(path, compact_every=3)
+    assert store.load() is None
+    store.add_recipe("fire", "water", "steam")
+    store.add_element("steam")
+    store.set_favorite("steam", True)
+    assert store.needs_compaction()
+    store.compact(RecipeIndex({("fire", "water"): "steam"}), {"steam"}, {"steam"}, wait=True)
+    assert not os.path.exists(str(tmp_path / "game_data.journal"))
+    store.add_recipe("steam", "earth", "geyser")
+    store.add_element("geyser")
+    store.set_favorite("steam", False)
+    store.close()
+
+    store = JournalStore(path)
+    recipes, inventory, favorites = store.load()
+    assert recipes.get("water", "fire") == "steam"
+    assert recipes.get("earth", "steam") == "geyser"
+    assert inventory == {"steam", "geyser"}
+    assert favorites == set()
+    assert store.pending == 3
+    store.close()
+
+
+def test_torn_journal_line_is_skipped_and_not_glued_to_the_next(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    journal = str(tmp_path / "game_data.journal")
+    with open(journal, "w", encoding="utf-8") as f:
+        f.write('["i", "steam"]\n["r", "fire", "ea')  # crashed mid-append
+    store = JournalStore(path)
+    store.add_element("mud")
+    store.close()
+    _recipes, inventory, _favorites = JournalStore(path).load()
+    assert inventory == {"steam", "mud"}
+
+
+def test_crash_during_compaction_keeps_the_folded_journal(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    store = JournalStore(path)
+    store.add_element("steam")
+    store.close()
+    # The compaction that should have folded this in never wrote its snapshot
+    os.replace(str(tmp_path / "game_data.journal"), str(tmp_path / "game_data.journal.compacting"))
+    store = JournalStore(path)
+    store.add_element("mud")
+
+    recipes, inventory, favorites = store.load()
+    assert inventory == {"steam", "mud"}
+    store.compact(recipes, inventory, favorites, wait=True)
+    store.close()
+    assert not os.path.exists(str(tmp_path / "game_data.journal.compacting"))
+    assert JournalStore(path).load()[1] == {"steam", "mud"}
+
+
+def test_failed_compaction_loses_nothing(tmp_path, monkeypatch):
+    import game_store
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    path = str(tmp_path / "game_data.bin")
+    with open(str(tmp_path / "game_data.journal.compacting"), "w", encoding="utf-8") as f:
+        f.write('["i", "steam"]\n')  # left over from an earlier crash
+    store = JournalStore(path)
+    store.add_element("mud")
+    monkeypatch.setattr(game_store, "write_snapshot", fail)
+    store.compact(RecipeIndex(), {"steam", "mud"}, set(), wait=True)
+    store.add_element("clay")
+    store.close()
+    monkeypatch.undo()
+
+    assert JournalStore(path).load()[1] == {"steam", "mud", "clay"}
+
+
+def test_json_store_refuses_once_a_binary_save_exists(tmp_path):
+    write_json_save(str(tmp_path / "game_data.json"), {("fire", "water"): "steam"}, ["steam"])
+    store = JournalStore(str(tmp_path / "game_data.bin"))
+    recipes, inventory, favorites = store.load()  # picks up the .json until the first compaction
+    assert recipes.get("fire", "water") == "steam"
+    store.compact(recipes, inventory, favorites, wait=True)
+    store.close()
+    with pytest.raises(ValueError):
+        JournalStore(str(tmp_path / "game_data.json")).load()
+
+
+def test_import_merges_a_json_save_without_a_blocking_snapshot(tmp_path):
+    from game_store import json_state
+
+    old = json_snapshot(RecipeIndex({("fire", "water"): "vapor", ("fire", "stone"): "magma"}),
+                        {"magma", "vapor"}, {"magma"})
+    core = GameCore(JournalStore(str(tmp_path / "game_data.bin"))).load()
+    assert core.import_state(*json_state(json.loads(json.dumps(old)))) == (1, 2)
+    assert core.lookup("water", "fire") == "steam"  # known pairs keep their result
+    assert core.lookup("stone", "fire") == "magma"
+    assert core.favorites == {"magma"}
+    assert not os.path.exists(str(tmp_path / "game_data.bin"))  # left to the usual compaction
+    core.close()
+
+    core = GameCore(JournalStore(str(tmp_path / "game_data.bin"))).load()
+    assert core.lookup("fire", "stone") == "magma" and "vapor" in core.inventory
+    core.close()
+    with pytest.raises(ValueError):
+        json_state(["not", "a", "save"])
@@ -0,0 +1,71 @@
+# tests/test_recipe_graph.py
+# RecipeGraph: shortest paths, reachability and dead ends, and incremental
+# updates (including a pair's result being replaced) matching a fresh build.
+#   python -m pytest -q tests
+import os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_core import STARTING_ELEMENTS, GameCore
+from game_store import JournalStore
+from recipe_graph import RecipeGraph
+from recipe_index import RecipeIndex
+
+
+def assert_matches_fresh_build(graph):
+    fresh = RecipeGraph(graph.index.copy())
+    for name in graph.index.names():
+        assert graph.cost(name) == fresh.cost(name), name
+        steps = graph.path(name)
+        if steps is None:
+            continue
+        made = set(STARTING_ELEMENTS)
+        for a, b, result in steps:
+            assert graph.index.get(a, b) == result  # only combines that exist
+            assert a in made and b in made
+            made.add(result)
+        assert name in made
+
+
+def test_path_and_reachable():
+    graph = RecipeGraph(RecipeIndex({("fire", "water"): "steam", ("steam", "earth"): "geyser",
+                                     ("geyser", "air"): "old faithful", ("moon", "air"): "tide"}))
+    assert graph.path("fire") == []
+    assert [result for _a, _b, result in graph.path("geyser")] == ["steam", "geyser"]
+    assert graph.cost("old faithful") == 3
+    assert graph.path("tide") is None
+    assert graph.reachable(["steam", "earth"]) == {"steam", "earth", "geyser"}
+
+
+def test_dead_ends_need_a_known_use():
+    graph = RecipeGraph(RecipeIndex({("fire", "water"): "steam", ("steam", "fire"): "steam",
+                                     ("fire", "earth"): "lava"}))
+    # steam only gives itself back; lava was never tried, so it isn't a dead end
+    assert graph.dead_ends() == ["steam"]
+
+
+def test_incremental_adds_and_replacements_match_a_fresh_build():
+    rng = random.Random(7)
+    names = list(STARTING_ELEMENTS) + [f"e{i}" for i in range(60)]
+    index = RecipeIndex()
+    graph = RecipeGraph(index)
+    for step in range(3000):
+        a, b = rng.choice(names[:8 + step // 50]), rng.choice(names[:8 + step // 50])
+        graph.add(a, b, rng.choice(names[4:]))  # often replaces a known pair's result
+        if step % 500 == 0:
+            assert_matches_fresh_build(graph)
+    assert_matches_fresh_build(graph)
+
+
+def test_game_core_keeps_its_graph_current(tmp_path):
+    core = GameCore(JournalStore(str(tmp_path / "game_data.bin"))).load()
+    graph = core.recipe_graph()
+    assert graph.cost("steam") == 1
+    core.record("steam", "earth", "geyser")
+    assert graph.cost("geyser") == 2
+    # another device got a different (alphabetically first) result for the pair
+    core.merge({"recipes": [["fire", "water", "boiling"]]})
+    assert graph.cost("steam") is None
+    assert graph.path("geyser") is None
+    assert graph.cost("boiling") == 1
+    core.close()
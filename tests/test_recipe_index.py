@@ -0,0 +1,100 @@
+# tests/test_recipe_index.py
+# RecipeIndex and the save-file pair keys, including saves written before
+# keys were escaped.
+#   python -m pytest -q tests
+import json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from game_store import json_snapshot, read_json_snapshot
+from recipe_index import KEY_FORMAT, RecipeIndex, decode_pair_key, encode_pair_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("fire", "water"),
+    ("c:\\x", "y"),
+    ("a+b", "c"),
+    ("\\", "+"),
+    ("ends with \\", "plus+"),
+])
+def test_pair_keys_round_trip(a, b):
+    assert decode_pair_key(encode_pair_key(a, b)) == (a, b)
+
+
+def test_plain_names_encode_like_old_keys():
+    assert encode_pair_key("fire", "water") == "fire+water"
+
+
+def test_legacy_keys_keep_backslashes():
+    # Old saves never escaped, so '\' is part of the name there
+    assert decode_pair_key("c:\\x+y", escaped=False) == ("c:\\x", "y")
+    assert decode_pair_key("c:\\x+y") == ("c:x", "y")
+
+
+def test_legacy_keys_with_plus_pick_the_known_split():
+    known = {"a+b", "c"}
+    assert decode_pair_key("a+b+c", known, escaped=False) == ("a+b", "c")
+    assert decode_pair_key("a+b+c", escaped=False) == ("a", "b+c")
+    with pytest.raises(ValueError):
+        decode_pair_key("fire", escaped=False)
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_read_json_snapshot_without_key_format(tmp_path):
+    path = str(tmp_path / "game_data.json")
+    write(path, {"recipes": {"c:\\x+y": "path", "a+b+c": "sum", "fire+water": "steam"},
+                 "inventory": ["c:\\x", "y", "a+b", "c"], "favorites": ["y"]})
+    recipes, inventory, favorites = read_json_snapshot(path)
+    assert recipes.get("c:\\x", "y") == "path"
+    assert recipes.get("a+b", "c") == "sum"
+    assert recipes.get("water", "fire") == "steam"
+    assert favorites == {"y"}
+
+
+def test_read_json_snapshot_key_format_2(tmp_path):
+    recipes = RecipeIndex({("c:\\x", "y"): "path", ("a+b", "c"): "sum", ("fire", "water"): "steam"})
+    data = json_snapshot(recipes, {"c:\\x", "y"}, {"y"})
+    assert data["key_format"] == KEY_FORMAT
+    path = str(tmp_path / "game_data.json")
+    write(path, data)
+    loaded, inventory, favorites = read_json_snapshot(path)
+    assert dict(loaded.items()) == dict(recipes.items())
+    assert inventory == {"c:\\x", "y"} and favorites == {"y"}
+
+
+def test_index_is_order_independent():
+    index = RecipeIndex()
+    assert index.add("water", "fire", "steam")
+    assert not index.add("fire", "water", "steam")
+    assert index.get("fire", "water") == "steam"
+    assert ("water", "fire") in index
+    assert len(index) == 1
+    assert index.add("fire", "water", "vapor")  # a pair can change result
+    assert index.get("water", "fire") == "vapor"
+    assert len(index) == 1
+
+
+def test_copy_is_independent_and_rebuilds_producers():
+    index = RecipeIndex({("fire", "water"): "steam", ("air", "water"): "rain"})
+    assert index.producers("steam") == [("fire", "water")]
+    other = index.copy()
+    other.add("lava", "water", "steam")
+    index.add("fire", "water", "vapor")
+    assert {frozenset(p) for p in other.producers("steam")} == {frozenset(("fire", "water")),
+                                                                  frozenset(("lava", "water"))}
+    assert index.producers("steam") == []
+    assert index.producers("vapor") == [("fire", "water")]
+    assert other.get("fire", "water") == "steam"
+
+
+def test_arrays_round_trip():
+    index = RecipeIndex({("fire", "water"): "steam", ("air", "earth"): "dust"})
+    loaded = RecipeIndex.from_arrays(*index.to_arrays())
+    assert dict(loaded.items()) == dict(index.items())
+    assert loaded.producers("dust") == [("air", "earth")]
@@ -0,0 +1,84 @@
+# tests/test_save_format.py
+# The binary snapshot format (game_data.bin) and its JSON conversion.
+#   python -m pytest -q tests
+import json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from recipe_index import RecipeIndex
+from save_format import HEADER, is_binary, main, read_snapshot, write_snapshot
+
+
+def sample_state():
+    recipes = RecipeIndex({("fire", "water"): "steam", ("steam", "earth"): "geyser",
+                           ("c:\\x", "a+b"): "💧 drop", ("fire", "fire"): "inferno"})
+    # inventory and favorites may hold names no recipe mentions
+    return recipes, {"fire", "water", "steam", "loner"}, {"steam", "ghost"}
+
+
+def write(path, state, compress):
+    with open(path, "wb") as f:
+        write_snapshot(f, *state, compress=compress)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, compress):
+    path = str(tmp_path / "game_data.bin")
+    state = sample_state()
+    write(path, state, compress)
+    assert is_binary(path)
+    recipes, inventory, favorites = read_snapshot(path)
+    assert dict(recipes.items()) == dict(state[0].items())
+    assert recipes.get("water", "fire") == "steam"
+    assert (inventory, favorites) == state[1:]
+
+
+def test_empty_state_round_trips(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    write(path, (RecipeIndex(), set(), set()), True)
+    recipes, inventory, favorites = read_snapshot(path)
+    assert len(recipes) == 0 and inventory == favorites == set()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_damage_is_detected(tmp_path, compress):
+    path = str(tmp_path / "game_data.bin")
+    write(path, sample_state(), compress)
+    with open(path, "r+b") as f:
+        f.seek(HEADER.size + 5)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(Exception):
+        read_snapshot(path)
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = str(tmp_path / "game_data.bin")
+    write(path, sample_state(), False)
+    with open(path, "r+b") as f:
+        f.truncate(HEADER.size + 3)
+    with pytest.raises(ValueError):
+        read_snapshot(path)
+
+
+def test_names_with_nul_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        write(str(tmp_path / "game_data.bin"), (RecipeIndex(), {"bad\0name"}, set()), True)
+
+
+def test_conversion_to_json_and_back(tmp_path):
+    src = str(tmp_path / "game_data.bin")
+    state = sample_state()
+    write(src, state, True)
+    as_json = str(tmp_path / "backup.json")
+    back = str(tmp_path / "again.bin")
+    assert main(["to-json", src, as_json]) == 0
+    with open(as_json, encoding="utf-8") as f:
+        assert sorted(json.load(f)["inventory"]) == sorted(state[1])
+    assert main(["to-binary", as_json, back, "--no-compress"]) == 0
+    recipes, inventory, favorites = read_snapshot(back)
+    assert dict(recipes.items()) == dict(state[0].items())
+    assert (inventory, favorites) == state[1:]
@@ -0,0 +1,32 @@
+# tests/test_search_index.py
+# Inventory search: prefix, substring and fuzzy matching.
+#   python -m pytest -q tests
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+
+
+def test_prefix_includes_names_outside_the_bmp():
+    index = SearchIndex(["a\U0001f600", "ab", "b", "a\uffff!"])
+    assert index.search("a") == {"a\U0001f600", "ab", "a\uffff!"}
+    assert index.prefix("a") == ["ab", "a\uffff!", "a\U0001f600"]
+    assert index.prefix("\U0001f600") == []
+
+
+def test_short_queries_are_prefixes_and_longer_ones_substrings():
+    index = SearchIndex(["steam", "steam engine", "mist", "team"])
+    assert index.search("st") == {"steam", "steam engine"}
+    assert index.search("team") == {"steam", "steam engine", "team"}
+    assert index.search("  STEAM ") == {"steam", "steam engine"}
+    assert index.search("") == {"steam", "steam engine", "mist", "team"}
+
+
+def test_fuzzy_fallback_and_incremental_add():
+    index = SearchIndex(["volcano"])
+    assert index.search("volcanoe") == {"volcano"}  # no substring match, so fuzzy
+    index.add("volcanic ash")
+    index.add("volcano")
+    assert len(index) == 2
+    assert index.search("volc") == {"volcano", "volcanic ash"}
@@ -0,0 +1,162 @@
+# tests/test_sync.py
+# Two local devices (GameCore + SyncLog, each in its own directory) syncing
+# through a shared folder, the way two phones would through Syncthing.
+#   python -m pytest -q tests
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from game_core import GameCore
+from game_store import JournalStore
+from sync import FolderSync, SyncLog, digest, sync_once
+
+
+def open_device(root, name):
+    path = os.path.join(root, name, "game_data.bin")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    core = GameCore(JournalStore(path)).load()
+    core.sync = SyncLog(path)
+    return core
+
+
+def sync_rounds(shared, *cores, rounds=3):
+    # Hash answers need a round trip, so a couple of rounds to settle
+    for _ in range(rounds):
+        for core in cores:
+            sync_once(core, shared)
+
+
+def assert_in_sync(a, b):
+    da, db = digest(*a.snapshot()), digest(*b.snapshot())
+    assert {k: v["top"] for k, v in da.items()} == {k: v["top"] for k, v in db.items()}
+    # the hashes kept up to date change by change match a full pass
+    assert a.hashes.digest() == da and b.hashes.digest() == db
+
+
+@pytest.fixture
+def devices(tmp_path):
+    shared = str(tmp_path / "shared")
+    os.makedirs(shared)
+    a, b = open_device(str(tmp_path), "a"), open_device(str(tmp_path), "b")
+    yield shared, a, b
+    a.close()
+    b.close()
+
+
+def test_history_from_before_sync_reaches_the_other_device(devices):
+    shared, a, b = devices
+    # Written straight into the save: nothing in the sync log covers it
+    for i in range(2000):
+        a.recipes.add(f"old {i % 300}", f"thing {i}", f"made {i % 500}")
+        a.inventory.add(f"made {i % 500}")
+    a.save(wait=True)
+    b.record("fire", "stone", "magma")
+
+    sync_rounds(shared, a, b)
+
+    assert b.lookup("thing 1999", "old 199") == "made 499"
+    assert a.lookup("stone", "fire") == "magma"
+    assert "made 0" in b.inventory and "magma" in a.inventory
+    assert_in_sync(a, b)
+
+
+def test_result_conflict_keeps_the_same_result_on_both(devices):
+    shared, a, b = devices
+    a.record("fire", "mud", "brick kiln")
+    b.record("mud", "fire", "adobe")
+
+    sync_rounds(shared, a, b)
+
+    assert a.lookup("fire", "mud") == b.lookup("fire", "mud") == "adobe"
+    # both results were found, so both stay in the inventory
+    assert {"adobe", "brick kiln"} <= a.inventory
+    assert {"adobe", "brick kiln"} <= b.inventory
+    assert_in_sync(a, b)
+
+
+def test_favorites_are_last_writer_wins(devices):
+    shared, a, b = devices
+    a.toggle_favorite("steam")
+    a.toggle_favorite("mud")
+    sync_rounds(shared, a, b)
+    assert b.favorites == {"steam", "mud"}
+
+    # b unfavorites steam after seeing a's write; a flips mud off and on again
+    b.toggle_favorite("steam")
+    for _ in range(2):
+        a.toggle_favorite("mud")
+    sync_rounds(shared, a, b)
+    assert a.favorites == b.favorites == {"mud"}
+
+    # Concurrent writes to one element: whichever stamp is later, the same everywhere
+    a.toggle_favorite("fire")
+    b.toggle_favorite("fire")
+    b.toggle_favorite("fire")
+    sync_rounds(shared, a, b)
+    assert a.favorites == b.favorites
+    assert_in_sync(a, b)
+
+
+def test_sync_state_survives_a_restart(tmp_path, devices):
+    shared, a, b = devices
+    a.record("air", "fire", "energy")
+    sync_rounds(shared, a, b)
+    device = b.sync.device
+    b.close()
+
+    b = open_device(str(tmp_path), "b")
+    try:
+        assert b.sync.device == device
+        assert b.lookup("fire", "air") == "energy"
+        a.record("energy", "water", "hydro")
+        sync_rounds(shared, a, b)
+        assert b.lookup("water", "energy") == "hydro"
+        assert_in_sync(a, b)
+    finally:
+        b.close()
+
+
+def test_changes_the_deltas_carry_need_no_hash_answers(devices):
+    shared, a, b = devices
+    sync_rounds(shared, a, b)
+    a.record("fire", "stone", "magma")
+    a.toggle_favorite("magma")
+    b.record("water", "stone", "pebble")
+
+    answered = []
+    for _ in range(3):
+        for core in (a, b):
+            answered += sync_once(core, shared)[1]["answered"]
+
+    assert answered == []
+    assert b.lookup("stone", "fire") == "magma" and b.favorites == {"magma"}
+    assert a.lookup("stone", "water") == "pebble"
+    assert_in_sync(a, b)
+
+
+def test_a_pruned_delta_is_filled_in_by_hashes(devices):
+    shared, a, b = devices
+    sync_rounds(shared, a, b)
+    a.record("fire", "stone", "magma")
+    sync_once(a, shared)
+    for name in os.listdir(os.path.join(shared, a.sync.device)):
+        if name[0].isdigit():
+            os.remove(os.path.join(shared, a.sync.device, name))  # lost before b read it
+
+    sync_rounds(shared, a, b)
+
+    assert b.lookup("fire", "stone") == "magma"
+    assert_in_sync(a, b)
+
+
+def test_push_needs_no_state_without_answers(devices):
+    shared, a, b = devices
+    sync_rounds(shared, a, b)
+    a.record("fire", "stone", "magma")
+    transport = FolderSync(shared, a.sync)
+    transport.pull()
+    mine = a.hashes.digest()
+    assert transport.to_answer(mine) == {}
+    assert transport.push(mine)["published"] == 2
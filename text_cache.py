@@ -0,0 +1,59 @@
+# text_cache.py
+# Small LRU used for chip label layout (wrapped text + height) and for the
+# rendered label textures shared between chips showing the same text.
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Mapping that drops the least recently used entries.
+
+    Bounded by `max_entries`, and optionally by `max_cost` where `cost(value)`
+    is e.g. a texture's size in bytes.
+    """
+
+    def __init__(self, max_entries=4096, max_cost=None, cost=None):
+        self.max_entries = max_entries
+        self.max_cost = max_cost
+        self.cost = cost
+        self.total_cost = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._data:
+            self._forget(key)
+        self._data[key] = value
+        if self.cost is not None:
+            self.total_cost += self.cost(value)
+        while len(self._data) > self.max_entries or (
+                self.max_cost is not None and self.total_cost > self.max_cost and len(self._data) > 1):
+            self._forget(next(iter(self._data)))
+            self.evictions += 1
+        return value
+
+    def _forget(self, key):
+        value = self._data.pop(key)
+        if self.cost is not None:
+            self.total_cost -= self.cost(value)
+
+    def clear(self):
+        self._data.clear()
+        self.total_cost = 0